@@ -1,15 +1,26 @@
-import socket
-
 from .message import read_json, write_json
+from .recording import received, sent
+from .transport import create_client_socket
 
 
 class JsonClient(object):
-    def __init__(self, server_address):
+    def __init__(
+        self,
+        server_address,
+        compress=False,
+        recorder=None,
+        read_timeout=None,
+    ):
         self.server_address = server_address
-        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.compress = compress
+        self.recorder = recorder
+        self.read_timeout = read_timeout
+        self.socket = None
 
     def connect(self):
-        self.socket.connect(self.server_address)
+        self.socket = create_client_socket(self.server_address)
+        # a silent connection is considered dead after read_timeout
+        self.socket.settimeout(self.read_timeout)
 
     def close(self):
         self.socket.close()
@@ -22,7 +33,12 @@ class JsonClient(object):
         self.close()
 
     def send_json(self, data):
-        write_json(self.socket, data)
+        if self.recorder is not None:
+            self.recorder.record(sent, data)
+        write_json(self.socket, data, self.compress)
 
     def receive_json(self):
-        return read_json(self.socket)
+        data = read_json(self.socket)
+        if self.recorder is not None:
+            self.recorder.record(received, data)
+        return data
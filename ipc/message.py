@@ -1,33 +1,52 @@
+import socket
 import struct
 import json
+import zlib
 
 
 _header_size = 4
+_compressed_flag = 0x80000000
+
+# frames smaller than this aren't worth compressing
+compression_threshold = 2 ** 12
 
 
 class ConnectionClosedError(Exception):
     pass
 
 
-def read_json(sock):
-    header = sock.recv(_header_size)
-    if len(header) == 0:
-        raise ConnectionClosedError()
-    size = struct.unpack('!i', header)[0]
-    data_size = size - _header_size
+def _receive(sock, size):
     data = b''
-    while len(data) < data_size:
-        packet = sock.recv(data_size - len(data))
+    while len(data) < size:
+        try:
+            packet = sock.recv(size - len(data))
+        except (socket.error, socket.timeout, OSError):
+            raise ConnectionClosedError()
         if len(packet) == 0:
             raise ConnectionClosedError()
         data += packet
+    return data
+
+
+def read_json(sock):
+    header = _receive(sock, _header_size)
+    size = struct.unpack('!I', header)[0]
+    compressed = size & _compressed_flag
+    data = _receive(sock, (size & ~_compressed_flag) - _header_size)
+    if compressed:
+        data = zlib.decompress(data)
     return json.loads(data.decode('utf-8'))
 
 
-def write_json(sock, data):
+def write_json(sock, data, compress=False):
     try:
-        data = json.dumps(data)
-        sock.sendall(struct.pack('!i', len(data) + _header_size))
-        sock.sendall(data.encode())
-    except OSError:
+        data = json.dumps(data).encode('utf-8')
+        size = len(data) + _header_size
+        if compress and len(data) >= compression_threshold:
+            compressed_data = zlib.compress(data)
+            if len(compressed_data) < len(data):
+                data = compressed_data
+                size = (len(data) + _header_size) | _compressed_flag
+        sock.sendall(struct.pack('!I', size) + data)
+    except (socket.error, OSError):
         raise ConnectionClosedError()
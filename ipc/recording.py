@@ -0,0 +1,77 @@
+import json
+import struct
+import threading
+import time
+import zlib
+
+
+# direction of a recorded frame
+received = 0
+sent = 1
+
+_record_header = struct.Struct('!dBI')  # time, direction, size
+_flush_interval = 1.0  # time in seconds
+
+
+class FrameRecorder(object):
+    """ Writes every frame with its time and direction to a file
+
+    All records go through one zlib stream, repetitive event streams
+    shrink a lot this way. The stream is flushed regularly so that a
+    recording stays readable if the process dies.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._file = open(path, 'wb')
+        self._compressor = zlib.compressobj()
+        self._lock = threading.Lock()
+        self._start_time = clock()
+        self._flush_time = self._start_time
+
+    def record(self, direction, data):
+        payload = json.dumps(data).encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                return
+            now = self.clock()
+            self._file.write(self._compressor.compress(_record_header.pack(
+                now - self._start_time, direction, len(payload)) + payload))
+            if now - self._flush_time >= _flush_interval:
+                self._file.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+                self._flush_time = now
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.write(self._compressor.flush())
+                self._file.close()
+                self._file = None
+
+
+def read_frames(path):
+    """ Yields the time, direction and frame of every recorded frame """
+    decompressor = zlib.decompressobj()
+    data = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(2 ** 16)
+            data += decompressor.decompress(chunk) if chunk \
+                else decompressor.flush()
+
+            offset = 0
+            while len(data) - offset >= _record_header.size:
+                timestamp, direction, size = _record_header.unpack_from(
+                    data, offset)
+                end = offset + _record_header.size + size
+                if end > len(data):
+                    break
+                payload = data[offset + _record_header.size:end]
+                yield timestamp, direction, json.loads(payload.decode('utf-8'))
+                offset = end
+            data = data[offset:]
+
+            if not chunk:
+                # a truncated last record is dropped
+                return
@@ -1,34 +1,60 @@
 import socket
 
 from .message import read_json, write_json
+from .recording import received, sent
+from .transport import bound_address, configure_connection, \
+    create_server_socket
 
 
 class JsonServer(object):
 
-    def __init__(self, server_address):
+    def __init__(
+        self,
+        server_address,
+        compress=False,
+        read_timeout=None,
+        recorder=None,
+    ):
         self.connection = None
+        self.compress = compress
+        self.read_timeout = read_timeout
+        self.recorder = recorder
 
-        self.socket = socket.socket(
-            socket.AF_UNIX,
-            socket.SOCK_STREAM,
-        )
-        self.socket.bind(server_address)
-        self.socket.listen(1)
+        self.socket = create_server_socket(server_address)
+        self.address = bound_address(self.socket)
 
     def wait_for_connection(self, timeout=None):
         self.socket.settimeout(timeout)
         self.connection, client_address = self.socket.accept()
         self.socket.settimeout(None)
+        configure_connection(self.connection)
+        # a silent connection is considered dead after read_timeout
+        self.connection.settimeout(self.read_timeout)
 
     def close(self):
         self.connection.close()
 
+    def shutdown(self):
+        """ Closes the listening socket and the current connection """
+        if self.connection is not None:
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except (socket.error, OSError):
+                pass
+            self.connection.close()
+        self.socket.close()
+
     def send_json(self, data):
-        write_json(self.connection, data)
+        if self.recorder is not None:
+            self.recorder.record(sent, data)
+        write_json(self.connection, data, self.compress)
 
     def serve_forever(self, callback):
         try:
             while True:
-                callback(read_json(self.connection))
+                data = read_json(self.connection)
+                if self.recorder is not None:
+                    self.recorder.record(received, data)
+                callback(data)
         finally:
             self.close()
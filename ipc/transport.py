@@ -0,0 +1,55 @@
+import os
+import socket
+
+
+_tcp_prefix = 'tcp://'
+
+
+def parse_address(address):
+    """ Returns the socket family and address for an address string
+
+    Addresses of the form tcp://host:port are TCP addresses, everything
+    else is the path of a unix domain socket.
+    """
+    if address.startswith(_tcp_prefix):
+        host, _, port = address[len(_tcp_prefix):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def format_address(family, address):
+    if family == socket.AF_INET:
+        return '%s%s:%i' % (_tcp_prefix, address[0], address[1])
+    return address
+
+
+def create_server_socket(address):
+    family, socket_address = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    elif os.path.exists(socket_address):
+        # left behind by a previous server for the same session
+        os.unlink(socket_address)
+    sock.bind(socket_address)
+    sock.listen(1)
+    return sock
+
+
+def create_client_socket(address):
+    family, socket_address = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(socket_address)
+    configure_connection(sock)
+    return sock
+
+
+def configure_connection(sock):
+    if sock.family == socket.AF_INET:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def bound_address(sock):
+    """ Returns the address string clients have to connect to """
+    return format_address(sock.family, sock.getsockname())
@@ -1,52 +1,167 @@
+import collections
+import json
+import socket
+import sys
 import threading
+import time
 
-from Queue import Queue
+from Queue import Empty, Queue
 
 from ipc.client import JsonClient
+from ipc.message import ConnectionClosedError
 
 from .service import LldbService
 
 
 class LldbClient(JsonClient):
 
-    def __init__(self, server_address):
+    heartbeat_interval = 5.0  # time in seconds
+    reconnect_timeout = 300.0  # time in seconds
+    reconnect_interval = 1.0  # time in seconds
+    replay_buffer_size = 2 ** 24  # bytes of encoded events
+
+    def __init__(
+        self,
+        server_address,
+        compress=False,
+        recorder=None,
+        read_timeout=None,
+    ):
         self.event_queue = Queue()
         self.service = LldbService(self)
         self.event_thread = None
         self.running = True
 
+        # every event gets a sequence number and is kept in the replay
+        # buffer so that it can be sent again after a reconnect, the
+        # oldest events are dropped once their total size is too large
+        self.seq = 0
+        self.sent_seq = 0
+        self.seq_lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.replay_buffer = collections.deque()  # (event, size)
+        self.replay_buffer_bytes = 0
+        self.connected = threading.Event()
+
         self.sender_thread = threading.Thread(
             target=self._process_event_queue,
         )
         self.sender_thread.daemon = True
         self.sender_thread.start()
 
-        super(LldbClient, self).__init__(server_address)
+        super(LldbClient, self).__init__(
+            server_address, compress, recorder, read_timeout)
+
+    def connect(self):
+        super(LldbClient, self).connect()
+        self.connected.set()
 
     def listen_forever(self):
         while self.running:
-            self._on_message(self.receive_json())
+            try:
+                message = self.receive_json()
+            except ConnectionClosedError:
+                if not self._reconnect():
+                    self._stop()
+                continue
+            self._on_message(message)
 
     def notify_event(self, name, **args):
         event = {'type': name}
         event.update(args)
-        self.event_queue.put(event)
+        with self.seq_lock:
+            self.seq += 1
+            event['seq'] = self.seq
+            size = len(json.dumps(event))
+            self.replay_buffer.append((event, size))
+            self.replay_buffer_bytes += size
+            while self.replay_buffer_bytes > self.replay_buffer_size:
+                _, size = self.replay_buffer.popleft()
+                self.replay_buffer_bytes -= size
+            self.event_queue.put(event)
 
     def _on_message(self, message):
         command = message.get('command', None)
         if command == 'stop':
             self._stop()
+        elif command == 'resume':
+            self._resume(message['last_seq'])
+        elif command == 'heartbeat':
+            pass
         else:
             func = getattr(self.service, command)
             del message['command']
             func(**message)
 
     def _stop(self):
-        self.service.running = False
         self.running = False
+        self.service.stop()
+
+    def _reconnect(self):
+        self.connected.clear()
+        self.close()
+
+        deadline = time.time() + self.reconnect_timeout
+        while self.running and time.time() < deadline:
+            try:
+                # the connection is marked as usable again once the server
+                # asked for the events it missed
+                super(LldbClient, self).connect()
+                return True
+            except (socket.error, OSError):
+                time.sleep(self.reconnect_interval)
+        return False
+
+    def _resume(self, last_seq):
+        with self.send_lock:
+            with self.seq_lock:
+                events = [
+                    event for event, _ in self.replay_buffer
+                    if event['seq'] > last_seq
+                ]
+                lost = self.seq - last_seq - len(events)
+            if lost > 0:
+                self.send_json({
+                    'type': 'error',
+                    'error': '%i events were lost while disconnected' % lost,
+                })
+            for event in events:
+                self.send_json(event)
+            if events:
+                self.sent_seq = events[-1]['seq']
+        self.connected.set()
+
+        # a reloaded plugin starts without any state, the replayed events
+        # don't necessarily contain it
+        self.service.notify_current_state()
+
+    def _send_event(self, event):
+        self.connected.wait()
+        with self.send_lock:
+            if event.get('seq', sys.maxsize) <= self.sent_seq:
+                # already sent when the connection was resumed
+                return
+            try:
+                self.send_json(event)
+            except ConnectionClosedError:
+                # the event stays in the replay buffer, the listening
+                # thread takes care of reconnecting
+                self.connected.clear()
+                try:
+                    self.socket.shutdown(socket.SHUT_RDWR)
+                except (socket.error, OSError):
+                    pass
+                return
+            if 'seq' in event:
+                self.sent_seq = event['seq']
 
     def _process_event_queue(self):
         while self.running:
-            event = self.event_queue.get()
-            self.send_json(event)
+            try:
+                event = self.event_queue.get(timeout=self.heartbeat_interval)
+            except Empty:
+                # lets the server tell an idle worker from a dead one
+                self._send_event({'type': 'heartbeat'})
+                continue
+            self._send_event(event)
             self.event_queue.task_done()
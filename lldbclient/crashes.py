@@ -0,0 +1,124 @@
+import os
+
+import lldb
+
+from .values import decode, get_frames, thread_to_dict
+
+
+class CrashHunt(object):
+    """ Relaunches the target until it ran run_limit times
+
+    Runs that exit normally are only counted. Crashes are reported with
+    the backtraces of all threads and a core file if a directory for the
+    core files is given. Only the first cores_per_signature crashes with
+    the same signature get a core file.
+    """
+
+    signature_frame_count = 5
+
+    def __init__(
+        self,
+        arguments,
+        environment,
+        run_limit,
+        core_directory=None,
+        frame_count=16,
+        cores_per_signature=3,
+    ):
+        self.arguments = arguments
+        self.environment = environment
+        self.run_limit = run_limit
+        self.core_directory = core_directory
+        self.frame_count = frame_count
+        self.cores_per_signature = cores_per_signature
+        self.runs = 0
+        self.crashes = 0
+        self._reported = (0, 0)
+        self._core_counts = {}
+
+    @property
+    def finished(self):
+        return self.runs >= self.run_limit
+
+    def on_crash(self, process, thread):
+        self.crashes += 1
+        threads = []
+        for other_thread in process:
+            frames, more = get_frames(other_thread, 0, self.frame_count)
+            threads.append(dict(
+                thread_to_dict(other_thread),
+                frames=frames,
+                more_frames=more,
+            ))
+
+        signature = crash_signature(
+            process, thread, self.signature_frame_count)
+        core_path = None
+        error = None
+        core_count = self._core_counts.get(signature, 0)
+        if self.core_directory is not None and \
+                core_count < self.cores_per_signature:
+            self._core_counts[signature] = core_count + 1
+            core_path = os.path.join(
+                self.core_directory, 'core.%i' % process.GetProcessID())
+            sb_error = process.SaveCore(core_path.encode('utf-8'))
+            if not sb_error.Success():
+                core_path = None
+                error = decode(sb_error.GetCString())
+
+        return {
+            'run': self.runs,
+            'signature': signature,
+            'description': decode(thread.GetStopDescription(256)),
+            'crashed_thread': thread.GetIndexID(),
+            'threads': threads,
+            'core_path': core_path,
+            'core_error': error,
+        }
+
+    def take_progress(self):
+        """ Returns the run and crash counts if they changed """
+        progress = (self.runs, self.crashes)
+        if progress == self._reported:
+            return None
+        self._reported = progress
+        return progress
+
+
+def crashed_thread(process):
+    for thread in process:
+        if thread.GetStopReason() in crash_stop_reasons:
+            return thread
+    return None
+
+
+def crash_signature(process, thread, frame_count):
+    """ Identifies a crash independently of addresses and the process
+
+    The signature consists of the signal or exception name and the
+    functions on top of the crashing thread's stack.
+    """
+    if thread.GetStopReason() == lldb.eStopReasonSignal:
+        signal = thread.GetStopReasonDataAtIndex(0)
+        reason = process.GetUnixSignals().GetSignalAsCString(signal) or \
+            'signal %i' % signal
+    else:
+        # exception descriptions contain the faulting address
+        reason = thread.GetStopDescription(256).split(' (')[0]
+
+    functions = []
+    for index in range(frame_count):
+        frame = thread.GetFrameAtIndex(index)
+        if not frame.IsValid():
+            break
+        functions.append(frame.GetFunctionName() or '%s`???' % (
+            frame.GetModule().GetFileSpec().GetFilename()))
+
+    return '%s in %s' % (
+        decode(reason), ' < '.join(decode(f) for f in functions))
+
+
+crash_stop_reasons = (
+    lldb.eStopReasonSignal,
+    lldb.eStopReasonException,
+)
@@ -0,0 +1,61 @@
+import threading
+
+from .values import decode
+
+
+class InstructionCache(object):
+    """ Decoded instructions cached per module and address range
+
+    Instructions are stored with file addresses, so the cache stays valid
+    across relaunches even if the module is loaded at another address.
+    """
+
+    max_entries = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def read(self, target, address, count):
+        sb_address = target.ResolveLoadAddress(address)
+        module = sb_address.GetModule()
+        file_address = sb_address.GetFileAddress()
+        key = (
+            module.GetUUIDString() or decode(module.GetFileSpec().fullpath),
+            file_address,
+            count,
+        )
+        with self._lock:
+            instructions = self._entries.get(key)
+
+        if instructions is None:
+            instructions = [
+                instruction_to_dict(target, instruction)
+                for instruction in target.ReadInstructions(sb_address, count)
+            ]
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = instructions
+
+        slide = address - file_address
+        return [
+            dict(instruction, address=instruction['file_address'] + slide)
+            for instruction in instructions
+        ]
+
+
+def instruction_to_dict(target, instruction):
+    address = instruction.GetAddress()
+    symbol = address.GetSymbol()
+    start = symbol.GetStartAddress().GetFileAddress() if symbol else None
+    return {
+        'file_address': address.GetFileAddress(),
+        'size': instruction.GetByteSize(),
+        'mnemonic': decode(instruction.GetMnemonic(target)),
+        'operands': decode(instruction.GetOperands(target)),
+        'comment': decode(instruction.GetComment(target)),
+        'symbol': decode(symbol.GetName()) if symbol else None,
+        'offset': address.GetFileAddress() - start
+            if start is not None else None,
+    }
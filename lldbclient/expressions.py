@@ -0,0 +1,65 @@
+import threading
+
+import lldb
+
+from .values import value_to_dict
+
+
+class ExpressionEvaluator(object):
+    """ Evaluates expressions and memoizes the results per stop epoch
+
+    The stop epoch changes whenever the process resumes, so a result is
+    reused as long as the process hasn't run in between.
+    """
+
+    children_limit = 50
+
+    def __init__(self):
+        self.stop_epoch = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def next_epoch(self):
+        with self._lock:
+            self.stop_epoch += 1
+            self._cache.clear()
+
+    def evaluate(self, frame, expression, timeout):
+        """ Returns the result and whether it was taken from the cache """
+        key = (
+            expression,
+            frame.GetThread().GetIndexID(),
+            frame.GetFrameID(),
+            self.stop_epoch,
+        )
+        with self._lock:
+            result = self._cache.get(key)
+        if result is not None:
+            return result, True
+
+        options = lldb.SBExpressionOptions()
+        options.SetTryAllThreads(False)
+        if timeout is not None:
+            options.SetTimeoutInMicroSeconds(int(timeout * 1000000))
+
+        result = to_result(
+            frame.EvaluateExpression(expression.encode('utf-8'), options),
+            self.children_limit,
+        )
+        with self._lock:
+            if key[3] == self.stop_epoch:
+                self._cache[key] = result
+        return result, False
+
+
+def to_result(value, children_limit):
+    error = value.GetError()
+    if error.Fail():
+        return {'error': error.GetCString()}
+
+    result = value_to_dict(value)
+    result['children'] = [
+        value_to_dict(value.GetChildAtIndex(i))
+        for i in range(min(value.GetNumChildren(), children_limit))
+    ]
+    return result
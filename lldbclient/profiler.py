@@ -0,0 +1,182 @@
+import collections
+import threading
+import time
+
+import lldb
+
+
+class SamplingProfiler(object):
+    """ Periodically interrupts the process and records all thread stacks
+
+    Stacks are stored as tuples of program counters and symbolicated in one
+    batch when the profile is finished.
+    """
+
+    stop_timeout = 1.0  # time in seconds to wait for the process to stop
+    hot_functions_limit = 100
+
+    def __init__(self, process, on_foreign_stop, clock=time.time):
+        self.process = process
+        self.on_foreign_stop = on_foreign_stop
+        self.clock = clock
+        self.active = False
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self.pause_time = 0.0
+        self.start_time = None
+        self.end_time = None
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._stop_event = None
+        self._awaiting_stop = False
+        self._awaiting_resume = False
+        self._thread = None
+
+    def start(self, rate):
+        self.active = True
+        self.start_time = self.clock()
+        self._thread = threading.Thread(target=self._sample, args=(rate,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        if self._thread is not None:
+            self._thread.join(self.stop_timeout * 2)
+            self._thread = None
+        self.end_time = self.clock()
+
+    def on_process_state(self, state, event):
+        """ Returns True if the state change was caused by the profiler """
+        with self._lock:
+            if state == lldb.eStateStopped and self._awaiting_stop:
+                self._awaiting_stop = False
+                self._stop_event = lldb.SBEvent(event)
+                self._stopped.set()
+                return True
+            if state == lldb.eStateRunning and self._awaiting_resume:
+                self._awaiting_resume = False
+                return True
+        return False
+
+    def _sample(self, rate):
+        period = 1.0 / rate
+        while self.active:
+            started = self.clock()
+            if self.process.GetState() == lldb.eStateRunning:
+                self._take_sample()
+            elapsed = self.clock() - started
+            time.sleep(max(0.0, period - elapsed))
+
+    def _take_sample(self):
+        started = self.clock()
+        with self._lock:
+            self._stopped.clear()
+            self._awaiting_stop = True
+        self.process.Stop()
+
+        if not self._stopped.wait(self.stop_timeout):
+            with self._lock:
+                self._awaiting_stop = False
+            return
+
+        if self._is_foreign_stop():
+            # something else (e.g. a breakpoint) stopped the process at the
+            # same time, let the regular stop handling take over
+            self.on_foreign_stop(self._stop_event)
+            return
+
+        for thread in self.process:
+            pcs = tuple(frame.GetPC() for frame in thread)
+            if pcs:
+                self.samples[pcs] += 1
+
+        with self._lock:
+            self._awaiting_resume = True
+        self.process.Continue()
+
+        self.sample_count += 1
+        self.pause_time += self.clock() - started
+
+    def _is_foreign_stop(self):
+        for thread in self.process:
+            if thread.GetStopReason() in foreign_stop_reasons:
+                return True
+        return False
+
+    def result(self, target):
+        names = self._symbolicate(target)
+        collapsed = collections.Counter()
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        for pcs, count in self.samples.items():
+            stack = [names[pc] for pc in reversed(pcs)]
+            collapsed[';'.join(s['name'] for s in stack)] += count
+            self_counts[pcs[0]] += count
+            for name in set(s['name'] for s in stack):
+                total_counts[name] += count
+
+        stack_count = sum(self.samples.values())
+        hot_functions = {}
+        for pc, count in self_counts.items():
+            symbol = names[pc]
+            entry = hot_functions.setdefault(symbol['name'], dict(
+                symbol,
+                self=0,
+                total=float(total_counts[symbol['name']]) / stack_count,
+            ))
+            entry['self'] += float(count) / stack_count
+
+        duration = (self.end_time or self.clock()) - self.start_time
+        return {
+            'collapsed': collapsed,
+            'hot_functions': sorted(
+                hot_functions.values(),
+                key=lambda f: f['self'],
+                reverse=True,
+            )[:self.hot_functions_limit],
+            'overhead': {
+                'samples': self.sample_count,
+                'duration': duration,
+                'rate': self.sample_count / duration if duration else 0.0,
+                'mean_pause': self.pause_time / self.sample_count
+                    if self.sample_count else 0.0,
+                'pause_fraction': self.pause_time / duration
+                    if duration else 0.0,
+            },
+        }
+
+    def _symbolicate(self, target):
+        names = {}
+        unique_pcs = set(pc for pcs in self.samples for pc in pcs)
+        for pc in unique_pcs:
+            address = target.ResolveLoadAddress(pc)
+            symbol = address.GetSymbol()
+            module = address.GetModule().GetFileSpec().GetFilename()
+            name = symbol.GetName() if symbol else '0x%x' % pc
+            if module:
+                name = '%s`%s' % (module, name)
+
+            line_entry = address.GetLineEntry()
+            file_spec = line_entry.GetFileSpec()
+            names[pc] = {
+                'name': name,
+                'file': file_spec.fullpath if file_spec else None,
+                'line': line_entry.GetLine() if file_spec else None,
+            }
+        return names
+
+
+def write_collapsed_stacks(path, collapsed):
+    with open(path, 'w') as f:
+        for stack, count in sorted(collapsed.items()):
+            f.write('%s %i\n' % (stack, count))
+
+
+foreign_stop_reasons = (
+    lldb.eStopReasonBreakpoint,
+    lldb.eStopReasonWatchpoint,
+    lldb.eStopReasonException,
+    lldb.eStopReasonPlanComplete,
+)
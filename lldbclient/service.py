@@ -1,10 +1,25 @@
+import binascii
 import lldb
 import os
 import threading
+import time
+
+from .crashes import CrashHunt, crashed_thread
+from .disassembly import InstructionCache
+from .expressions import ExpressionEvaluator, to_result
+from .profiler import SamplingProfiler, write_collapsed_stacks
+from .stats import BreakpointStats
+from .values import (
+    decode, frame_to_dict, get_frames, thread_to_dict, value_to_dict,
+)
+from .watchpoints import WatchpointError, WatchpointSlots
 
 
 class LldbService(object):
 
+    stats_interval = 1.0  # time in seconds between statistics updates
+    event_timeout = 1  # time in seconds, WaitForEvent takes whole seconds
+
     def __init__(self, listener):
         self.running = True
         self.debugger = lldb.SBDebugger.Create()
@@ -13,13 +28,34 @@ class LldbService(object):
         self.target = None
         self.process = None
         self.listener = listener
-        self.event_thread = None
         self.executable_path =None
+        self.breakpoint_stats = BreakpointStats()
+        self.profiler = None
+        self.evaluator = ExpressionEvaluator()
+        self.step_lock = threading.Lock()
+        self.step_in_flight = False
+        self.pending_steps = []
+        self.notified_state = None
+        self.run_to_breakpoint_ids = set()
+        self.watchpoint_slots = None
+        self.instruction_cache = InstructionCache()
+        self.crash_hunt = None
+
+        self.event_listener = self._create_event_listener()
+        self.event_callbacks = self._create_event_callbacks()
+        self.event_thread = threading.Thread(target=self._run_event_loop)
+        self.event_thread.daemon = True
+        self.event_thread.start()
 
-    def create_target(self, executable_path):
+    def create_target(self, executable_path, load_dependent_modules=True):
         self.executable_path = executable_path.encode('utf-8')
-        self.target = self.debugger.CreateTargetWithFileAndArch(
-            self.executable_path, lldb.LLDB_ARCH_DEFAULT)
+        if load_dependent_modules:
+            self.target = self.debugger.CreateTargetWithFileAndArch(
+                self.executable_path, lldb.LLDB_ARCH_DEFAULT)
+        else:
+            self._set_preload_symbols(False)
+            self.target = self.debugger.CreateTarget(
+                self.executable_path, None, None, False, lldb.SBError())
         if not self.target:
             self._notify_error(
                 'Couldn\'t create target %r' % self.executable_path)
@@ -29,81 +65,385 @@ class LldbService(object):
             if environment is None:
                 environment = os.environ
 
-            process_listener = lldb.SBListener('process_listener')
-            process_listener.StartListeningForEventClass(
-                self.debugger,
-                lldb.SBProcess.GetBroadcasterClassName(),
-                lldb.SBProcess.eBroadcastBitStateChanged |
-                lldb.SBProcess.eBroadcastBitSTDOUT |
-                lldb.SBProcess.eBroadcastBitSTDERR,
-            )
-            thread_listener = lldb.SBListener('thread_listener')
-            thread_listener.StartListeningForEventClass(
-                self.debugger,
-                lldb.SBThread.GetBroadcasterClassName(),
-                lldb.SBThread.eBroadcastBitSelectedFrameChanged,
-            )
             error = lldb.SBError()
 
             launch_info = lldb.SBLaunchInfo([str(arg) for arg in arguments])
             launch_info.SetEnvironmentEntries(
                 [k + "=" + v for k, v in environment.items()], False)
-            launch_info.SetListener(process_listener)
+            launch_info.SetListener(self.event_listener)
 
             self.process = self.target.Launch(launch_info, error)
 
-            if error.Success() and self.process:
-                self.process_event_thread = threading.Thread(
-                    target=self._handle_listener,
-                    args=(
-                        process_listener,
-                        {
-                            lldb.SBProcess.eBroadcastBitStateChanged:
-                                self._notify_process_state,
-                            lldb.SBProcess.eBroadcastBitSTDOUT:
-                                self._notify_process_std_out,
-                            lldb.SBProcess.eBroadcastBitSTDERR:
-                                self._notify_process_std_err,
-                        }
-                    ),
-                )
-                self.process_event_thread.daemon = True
-                self.process_event_thread.start()
-
-                self.thread_event_thread = threading.Thread(
-                    target=self._handle_listener,
-                    args=(
-                        thread_listener,
-                        {
-                            lldb.SBThread.eBroadcastBitSelectedFrameChanged:
-                                self._notify_location,
-                        }
-                    ),
-                )
-                self.thread_event_thread.daemon = True
-                self.thread_event_thread.start()
-            else:
+            if not error.Success() or not self.process:
                 self._notify_error(
                     'Couldn\'t launch target %r' % self.executable_path)
         else:
             self._notify_error('No target created yet')
 
+    def process_attach(
+        self,
+        pid=None,
+        name=None,
+        wait_for=False,
+        load_dependent_modules=True,
+    ):
+        if not load_dependent_modules:
+            self._set_preload_symbols(False)
+        if not self.target:
+            self.target = self.debugger.CreateTarget('')
+
+        if pid is not None:
+            attach_info = lldb.SBAttachInfo(pid)
+        else:
+            attach_info = lldb.SBAttachInfo(name.encode('utf-8'), wait_for)
+
+        attach_info.SetListener(self.event_listener)
+        error = lldb.SBError()
+
+        self.process = self.target.Attach(attach_info, error)
+
+        if not error.Success() or not self.process:
+            self._notify_error('Couldn\'t attach to %s: %s' % (
+                pid if pid is not None else repr(name), error.GetCString()))
+
+    def target_load_core(self, core_path, executable_path=None, frame_count=8):
+        self._set_preload_symbols(False)
+        self.executable_path = (executable_path or '').encode('utf-8')
+        self.target = self.debugger.CreateTarget(
+            self.executable_path, None, None, False, lldb.SBError())
+        if not self.target:
+            self._notify_error(
+                'Couldn\'t create target %r' % self.executable_path)
+            return
+
+        self.process = self.target.LoadCore(core_path.encode('utf-8'))
+        if not self.process:
+            self._notify_error('Couldn\'t load core file %r' % core_path)
+            return
+
+        # only the thread list and the top of the crashing thread are
+        # reported, everything else is fetched on demand
+        crashed_thread = None
+        threads = []
+        for thread in self.process:
+            threads.append(thread_to_dict(thread))
+            if crashed_thread is None and \
+                    thread.GetStopReason() != lldb.eStopReasonNone:
+                crashed_thread = thread
+
+        if crashed_thread is None:
+            crashed_thread = self.process.GetThreadAtIndex(0)
+        self.process.SetSelectedThread(crashed_thread)
+        frames, more = get_frames(crashed_thread, 0, frame_count)
+
+        self.listener.notify_event(
+            'core_loaded',
+            threads=threads,
+            crashed_thread=crashed_thread.GetIndexID(),
+            stop_description=crashed_thread.GetStopDescription(256),
+            frames=frames,
+            more_frames=more,
+        )
+        self._notify_location(None)
+
+    def thread_get_frames(self, thread_index, start, count):
+        thread = self.process.GetThreadByIndexID(thread_index)
+        frames, more = get_frames(thread, start, count)
+        self.listener.notify_event(
+            'frames',
+            thread_index=thread_index,
+            start=start,
+            frames=frames,
+            more_frames=more,
+        )
+
+    def thread_select(self, thread_index, frame_index):
+        thread = self.process.GetThreadByIndexID(thread_index)
+        self.process.SetSelectedThread(thread)
+        thread.SetSelectedFrame(frame_index)
+        self._notify_location(None)
+
+    def frame_get_variables(self, thread_index, frame_index, start, count):
+        thread = self.process.GetThreadByIndexID(thread_index)
+        frame = thread.GetFrameAtIndex(frame_index)
+        variables = frame.GetVariables(True, True, False, True)
+        end = min(start + count, variables.GetSize())
+        self.listener.notify_event(
+            'variables',
+            thread_index=thread_index,
+            frame_index=frame_index,
+            start=start,
+            variables=[
+                value_to_dict(variables.GetValueAtIndex(i))
+                for i in range(start, end)
+            ],
+            more_variables=end < variables.GetSize(),
+        )
+
+    def evaluate(
+        self,
+        request_id,
+        expression,
+        thread_index=None,
+        frame_index=None,
+        timeout=None,
+    ):
+        # commands are handled one at a time, so a running evaluation can't
+        # be cancelled, only the lldb timeout bounds it
+        frame = self._get_frame(thread_index, frame_index)
+        if frame.IsValid():
+            result, cached = self.evaluator.evaluate(
+                frame, expression, timeout)
+        else:
+            result, cached = {'error': 'No frame selected'}, False
+
+        self.listener.notify_event(
+            'evaluate_result',
+            request_id=request_id,
+            result=result,
+            cached=cached,
+        )
+
+    def frame_find_variable(
+        self,
+        request_id,
+        path,
+        thread_index=None,
+        frame_index=None,
+    ):
+        # variable lookups don't run the expression evaluator which makes
+        # them cheap enough for hovering
+        frame = self._get_frame(thread_index, frame_index)
+        if not frame.IsValid():
+            result = {'error': 'No frame selected'}
+        elif path.replace('_', 'a').isalnum():
+            result = to_result(frame.FindVariable(path.encode('utf-8')), 20)
+        else:
+            result = to_result(
+                frame.GetValueForVariablePath(path.encode('utf-8')), 20)
+
+        self.listener.notify_event(
+            'variable_result',
+            request_id=request_id,
+            result=result,
+        )
+
+    def read_instructions(self, request_id, address, count):
+        self.listener.notify_event(
+            'instructions',
+            request_id=request_id,
+            address=address,
+            instructions=self.instruction_cache.read(
+                self.target, address, count),
+        )
+
+    def process_read_memory(self, address, size):
+        error = lldb.SBError()
+        data = self.process.ReadMemory(address, size, error)
+        if error.Success():
+            self.listener.notify_event(
+                'memory',
+                address=address,
+                data=binascii.hexlify(data).decode('ascii'),
+            )
+        else:
+            self._notify_error('Couldn\'t read memory at 0x%x: %s' % (
+                address, error.GetCString()))
+
     def target_set_breakpoint(self, file, line):
+        if not self.target:
+            self._notify_error('No target created yet')
+            return
+
         breakpoint = self.target.BreakpointCreateByLocation(
             file.encode('utf-8'),
             line,
         )
-        if not breakpoint:
+        if breakpoint:
+            self.breakpoint_stats.add(breakpoint.GetID(), file, line)
+        else:
             self._notify_error('Couldn\'t set breakpoint %s:%i' % (file, line))
 
+    def target_set_temporary_breakpoint(self, file, line):
+        """ Sets a breakpoint which is deleted once it's hit """
+        breakpoint = self.target.BreakpointCreateByLocation(
+            file.encode('utf-8'),
+            line,
+        )
+        if breakpoint:
+            breakpoint.SetOneShot(True)
+        else:
+            self._notify_error('Couldn\'t set breakpoint %s:%i' % (file, line))
+        return breakpoint
+
+    def run_to_line(self, file, line):
+        breakpoint = self.target_set_temporary_breakpoint(file, line)
+        if breakpoint:
+            # removed on the next stop even if it wasn't hit
+            self.run_to_breakpoint_ids.add(breakpoint.GetID())
+            self.process_continue()
+
     def target_delete_breakpoint(self, file, line):
-        file = os.path.basename(file)
-        self.handle_command(
-            'breakpoint clear -f %s -l %s' % (file, line))
+        breakpoint_ids = self.breakpoint_stats.find(file, line)
+        if breakpoint_ids:
+            for breakpoint_id in breakpoint_ids:
+                self.target.BreakpointDelete(breakpoint_id)
+                self.breakpoint_stats.remove(breakpoint_id)
+        else:
+            file = os.path.basename(file)
+            self.handle_command(
+                'breakpoint clear -f %s -l %s' % (file, line))
+
+    def watchpoint_set(
+        self,
+        variable=None,
+        address=None,
+        size=None,
+        read=False,
+        write=True,
+        policy='none',
+    ):
+        try:
+            slots = self._get_watchpoint_slots(policy)
+            evicted = slots.reserve()
+        except WatchpointError as e:
+            self._notify_error(str(e))
+            return
+
+        if evicted is not None:
+            self.watchpoint_delete(evicted['id'])
+
+        error = lldb.SBError()
+        if variable is not None:
+            frame = self._get_frame(None, None)
+            value = frame.GetValueForVariablePath(variable.encode('utf-8'))
+            watchpoint = value.Watch(True, read, write, error)
+            description = variable
+            value_type = value.GetType()
+        else:
+            watchpoint = self.target.WatchAddress(
+                address, size or 8, read, write, error)
+            description = '0x%x' % address
+            value_type = None
+
+        if not error.Success() or not watchpoint.IsValid():
+            self._notify_error('Couldn\'t watch %s: %s' % (
+                description, error.GetCString()))
+            if evicted is not None:
+                # deleted already, the plugin has to forget it as well
+                self.listener.notify_event(
+                    'watchpoint_evicted',
+                    watchpoint=watchpoint_to_dict(evicted),
+                )
+            return
+
+        entry = {
+            'id': watchpoint.GetID(),
+            'description': description,
+            'address': watchpoint.GetWatchAddress(),
+            'size': watchpoint.GetWatchSize(),
+            'read': read,
+            'write': write,
+            'type': value_type,
+        }
+        entry['value'] = self._read_watched_value(entry)
+        slots.add(entry)
+        self.listener.notify_event(
+            'watchpoint_set',
+            watchpoint=watchpoint_to_dict(entry),
+            evicted=watchpoint_to_dict(evicted) if evicted else None,
+        )
+
+    def watchpoint_delete(self, watchpoint_id):
+        if self.watchpoint_slots is not None:
+            self.watchpoint_slots.remove(watchpoint_id)
+        self.target.DeleteWatchpoint(watchpoint_id)
 
     def process_kill(self):
         self.process.Kill()
 
+    def thread_step(self, kind):
+        with self.step_lock:
+            if self.step_in_flight:
+                # coalesced with the running step, intermediate stops
+                # won't be reported. Repeated keys while a step is running
+                # queue at most one step of each kind.
+                if kind not in self.pending_steps:
+                    self.pending_steps.append(kind)
+                return
+            if not self.process or \
+                    self.process.GetState() != lldb.eStateStopped:
+                return
+            self.step_in_flight = True
+        self._start_step(kind)
+
+    def process_continue(self):
+        with self.step_lock:
+            del self.pending_steps[:]
+        self.process.Continue()
+
+    def run_until_crash(
+        self,
+        arguments,
+        environment,
+        run_limit,
+        core_directory=None,
+        frame_count=16,
+        cores_per_signature=3,
+    ):
+        if not self.target:
+            self._notify_error('No target created yet')
+            return
+
+        self.crash_hunt = CrashHunt(
+            arguments,
+            environment,
+            run_limit,
+            core_directory,
+            frame_count,
+            cores_per_signature,
+        )
+        self._launch_next_run()
+
+    def profile_start(self, rate):
+        if not self.process:
+            self._notify_error('No process running')
+        elif self.profiler is not None and self.profiler.active:
+            self._notify_error('Profiler is already running')
+        else:
+            self.profiler = SamplingProfiler(
+                self.process, self._notify_process_state)
+            self.profiler.start(rate)
+
+    def profile_stop(self, output_path):
+        if self.profiler is None:
+            self._notify_error('Profiler is not running')
+            return
+
+        self.profiler.stop()
+        result = self.profiler.result(self.target)
+        write_collapsed_stacks(output_path, result['collapsed'])
+        self.profiler = None
+        self.listener.notify_event(
+            'profile_finished',
+            output_path=output_path,
+            hot_functions=result['hot_functions'],
+            overhead=result['overhead'],
+        )
+
+    def notify_current_state(self):
+        """ Reports the state of the process and where it is stopped """
+        if not self.process or not self.process.IsValid():
+            return
+
+        state = self.process.GetState()
+        self.listener.notify_event(
+            'process_state',
+            state=process_state_names.get(state, 'invalid'),
+        )
+        if state == lldb.eStateStopped:
+            self._notify_location(None)
+
     def frame_get_line_entry(self):
         thread = self.process.GetSelectedThread()
         frame = thread.GetSelectedFrame()
@@ -118,6 +458,33 @@ class LldbService(object):
             }
 
     def handle_command(self, input):
+        output, success = self._run_command(input)
+        self.listener.notify_event(
+            'command_finished',
+            output=output,
+            success=success,
+        )
+
+    def handle_commands(self, inputs, stop_on_error=False):
+        """ Runs several commands and reports them in a single event """
+        results = []
+        for input in inputs:
+            output, success = self._run_command(input)
+            results.append({
+                'input': input,
+                'output': output,
+                'success': success,
+            })
+            if not success and stop_on_error:
+                break
+
+        self.listener.notify_event(
+            'commands_finished',
+            results=results,
+            success=all(result['success'] for result in results),
+        )
+
+    def _run_command(self, input):
         result = lldb.SBCommandReturnObject()
         interpreter = self.debugger.GetCommandInterpreter()
         interpreter.HandleCommand(input.encode('utf-8'), result)
@@ -125,22 +492,12 @@ class LldbService(object):
             output = result.GetOutput()
             if output is not None:
                 output = output.decode('unicode-escape')
-
-            self.listener.notify_event(
-                'command_finished',
-                output=output,
-                success=True,
-            )
+            return output, True
         else:
             error = result.GetError()
             if error is not None:
                 error = error.decode('unicode-escape')
-
-            self.listener.notify_event(
-                'command_finished',
-                output=error,
-                success=False,
-            )
+            return error, False
 
     def handle_completion(self, current_line, cursor_pos):
         matches = lldb.SBStringList()
@@ -152,17 +509,269 @@ class LldbService(object):
             matches=[m.decode('unicode-escape') for m in matches],
         )
 
-    def _handle_listener(self, listener, callbacks):
+    def _get_frame(self, thread_index, frame_index):
+        if not self.process:
+            return lldb.SBFrame()
+
+        if thread_index is None:
+            thread = self.process.GetSelectedThread()
+        else:
+            thread = self.process.GetThreadByIndexID(thread_index)
+
+        if frame_index is None:
+            return thread.GetSelectedFrame()
+        return thread.GetFrameAtIndex(frame_index)
+
+    def _set_preload_symbols(self, enabled):
+        # symbols of dependent modules are loaded lazily when first needed
+        lldb.SBDebugger.SetInternalVariable(
+            'target.preload-symbols',
+            'true' if enabled else 'false',
+            self.debugger.GetInstanceName(),
+        )
+
+    def stop(self, timeout=None):
+        """ Stops the event loop and waits for it to finish
+
+        The loop wakes up at least every event_timeout seconds, so by
+        default this doesn't block longer than that.
+        """
+        self.running = False
+        if self.event_thread is not threading.current_thread():
+            self.event_thread.join(
+                timeout if timeout is not None else self.event_timeout * 2)
+
+    def _create_event_listener(self):
+        # registering for the event classes also covers targets and
+        # processes created after this call
+        listener = lldb.SBListener('lldb_service')
+        listener.StartListeningForEventClass(
+            self.debugger,
+            lldb.SBProcess.GetBroadcasterClassName(),
+            lldb.SBProcess.eBroadcastBitStateChanged |
+            lldb.SBProcess.eBroadcastBitSTDOUT |
+            lldb.SBProcess.eBroadcastBitSTDERR,
+        )
+        listener.StartListeningForEventClass(
+            self.debugger,
+            lldb.SBThread.GetBroadcasterClassName(),
+            lldb.SBThread.eBroadcastBitSelectedFrameChanged,
+        )
+        listener.StartListeningForEventClass(
+            self.debugger,
+            lldb.SBTarget.GetBroadcasterClassName(),
+            lldb.SBTarget.eBroadcastBitBreakpointChanged,
+        )
+        return listener
+
+    def _create_event_callbacks(self):
+        process_class = lldb.SBProcess.GetBroadcasterClassName()
+        thread_class = lldb.SBThread.GetBroadcasterClassName()
+        target_class = lldb.SBTarget.GetBroadcasterClassName()
+        return {
+            (process_class, lldb.SBProcess.eBroadcastBitStateChanged):
+                self._notify_process_state,
+            (process_class, lldb.SBProcess.eBroadcastBitSTDOUT):
+                self._notify_process_std_out,
+            (process_class, lldb.SBProcess.eBroadcastBitSTDERR):
+                self._notify_process_std_err,
+            (thread_class, lldb.SBThread.eBroadcastBitSelectedFrameChanged):
+                self._notify_location,
+            (target_class, lldb.SBTarget.eBroadcastBitBreakpointChanged):
+                self._on_breakpoint_changed,
+        }
+
+    def _run_event_loop(self):
+        """ Dispatches the events of all broadcasters on a single thread
+
+        Waiting with a short timeout lets the loop notice a stop request
+        and send the periodic statistics in between events.
+        """
+        next_stats = time.time() + self.stats_interval
         while self.running:
             event = lldb.SBEvent()
-            result = listener.WaitForEvent(lldb.UINT32_MAX, event)
-            if result and event.IsValid():
-                callback = callbacks.get(event.GetType())
-                if callback is not None:
-                    callback(event)
+            try:
+                if self.event_listener.WaitForEvent(
+                        self.event_timeout, event) and event.IsValid():
+                    callback = self.event_callbacks.get(
+                        (event.GetBroadcasterClass(), event.GetType()))
+                    if callback is not None:
+                        callback(event)
+
+                now = time.time()
+                if now >= next_stats:
+                    next_stats = now + self.stats_interval
+                    self._notify_stats()
+            except Exception as e:
+                # this is the only event thread, it has to survive
+                self._notify_error('Failed to handle lldb event: %s' % e)
+
+    def _on_breakpoint_changed(self, event):
+        # breakpoints can also be deleted from the console
+        event_type = lldb.SBBreakpoint.GetBreakpointEventTypeFromEvent(event)
+        if event_type == lldb.eBreakpointEventTypeRemoved:
+            breakpoint = lldb.SBBreakpoint.GetBreakpointFromEvent(event)
+            self.breakpoint_stats.remove(breakpoint.GetID())
+
+    def _launch_next_run(self):
+        crash_hunt = self.crash_hunt
+        if not crash_hunt.finished and self.running:
+            crash_hunt.runs += 1
+            self.target_launch(crash_hunt.arguments, crash_hunt.environment)
+            if self.process:
+                return
+
+        self.crash_hunt = None
+        self.listener.notify_event(
+            'crash_hunt_finished',
+            runs=crash_hunt.runs,
+            crashes=crash_hunt.crashes,
+        )
+
+    def _on_crash_hunt_state(self, state):
+        # the individual runs aren't reported, the plugin only gets the
+        # crashes and the progress
+        if state in (lldb.eStateStopped, lldb.eStateCrashed):
+            thread = crashed_thread(self.process)
+            if thread is None:
+                self.process.Continue()
+                return
+            self.listener.notify_event(
+                'crash_found',
+                **self.crash_hunt.on_crash(self.process, thread))
+            self.process.Kill()
+        elif state in (lldb.eStateExited, lldb.eStateDetached):
+            self._launch_next_run()
+
+    def _notify_stats(self):
+        crash_hunt = self.crash_hunt
+        progress = crash_hunt.take_progress() \
+            if crash_hunt is not None else None
+        if progress is not None:
+            self.listener.notify_event(
+                'crash_hunt_progress', runs=progress[0], crashes=progress[1])
+        delta = self.breakpoint_stats.take_delta()
+        if delta:
+            self.listener.notify_event('breakpoint_stats', delta=delta)
+        if self.watchpoint_slots is not None:
+            counts = self.watchpoint_slots.take_counts()
+            if counts is not None:
+                self.listener.notify_event('watchpoint_stats', counts=counts)
+
+    def _start_step(self, kind):
+        thread = self.process.GetSelectedThread()
+        if kind == 'over':
+            thread.StepOver()
+        elif kind == 'into':
+            thread.StepInto()
+        elif kind == 'out':
+            thread.StepOut()
+        else:
+            self._notify_error('Unknown step kind %r' % kind)
+
+    def _next_pending_step(self):
+        """ Returns the next coalesced step if the last one completed """
+        with self.step_lock:
+            if not self.step_in_flight:
+                return None
+
+            thread = self.process.GetSelectedThread()
+            if self.pending_steps and \
+                    thread.GetStopReason() == lldb.eStopReasonPlanComplete:
+                return self.pending_steps.pop(0)
+
+            self.step_in_flight = False
+            del self.pending_steps[:]
+            return None
+
+    def _delete_run_to_breakpoints(self):
+        for breakpoint_id in self.run_to_breakpoint_ids:
+            self.target.BreakpointDelete(breakpoint_id)
+        self.run_to_breakpoint_ids.clear()
+
+    def _get_watchpoint_slots(self, policy):
+        if self.watchpoint_slots is None:
+            error = lldb.SBError()
+            slot_count = self.process.GetNumSupportedHardwareWatchpoints(error)
+            self.watchpoint_slots = WatchpointSlots(
+                slot_count if error.Success() else 4, policy)
+        elif policy not in WatchpointSlots.policies:
+            raise WatchpointError('Unknown eviction policy %r' % policy)
+        else:
+            self.watchpoint_slots.policy = policy
+        return self.watchpoint_slots
+
+    def _read_watched_value(self, entry):
+        if entry['type'] is not None:
+            value = self.target.CreateValueFromAddress(
+                entry['description'].encode('utf-8'),
+                lldb.SBAddress(entry['address'], self.target),
+                entry['type'],
+            )
+            return decode(value.GetValue() or value.GetSummary())
+
+        error = lldb.SBError()
+        data = self.process.ReadMemory(entry['address'], entry['size'], error)
+        return binascii.hexlify(data).decode('ascii') \
+            if error.Success() else None
+
+    def _notify_watchpoint_hits(self):
+        for thread in self.process:
+            if thread.GetStopReason() != lldb.eStopReasonWatchpoint:
+                continue
+
+            watchpoint_id = thread.GetStopReasonDataAtIndex(0)
+            entry = self.watchpoint_slots.on_hit(watchpoint_id) \
+                if self.watchpoint_slots is not None else None
+            if entry is None:
+                continue
+
+            old_value = entry['value']
+            entry['value'] = self._read_watched_value(entry)
+            self.listener.notify_event(
+                'watchpoint_hit',
+                watchpoint=watchpoint_to_dict(entry),
+                old_value=old_value,
+                new_value=entry['value'],
+                frame=frame_to_dict(thread.GetFrameAtIndex(0)),
+            )
+
+    def _stopped_breakpoint_ids(self):
+        breakpoint_ids = []
+        for thread in self.process:
+            if thread.GetStopReason() == lldb.eStopReasonBreakpoint:
+                # data comes in pairs of breakpoint id and location id
+                for i in range(0, thread.GetStopReasonDataCount(), 2):
+                    breakpoint_ids.append(thread.GetStopReasonDataAtIndex(i))
+        return breakpoint_ids
 
     def _notify_process_state(self, event):
         state = lldb.SBProcess.GetStateFromEvent(event)
+        if self.profiler is not None and self.profiler.active:
+            if self.profiler.on_process_state(state, event):
+                return
+            if state in (lldb.eStateExited, lldb.eStateCrashed):
+                self.profiler.active = False
+
+        if self.crash_hunt is not None:
+            self._on_crash_hunt_state(state)
+            return
+
+        if state == lldb.eStateStopped:
+            next_step = self._next_pending_step()
+            if next_step is not None:
+                self._start_step(next_step)
+                return
+            self.breakpoint_stats.on_stop(self._stopped_breakpoint_ids())
+            self._delete_run_to_breakpoints()
+            self._notify_watchpoint_hits()
+        elif state == lldb.eStateRunning:
+            self.breakpoint_stats.on_resume()
+            self.evaluator.next_epoch()
+            if self.notified_state == state:
+                return
+
+        self.notified_state = state
         self.listener.notify_event(
             'process_state',
             state=process_state_names[state],
@@ -174,10 +783,29 @@ class LldbService(object):
         line_entry = self.frame_get_line_entry()
         if line_entry:
             self.listener.notify_event('location', line_entry=line_entry)
+        else:
+            self._notify_address_location()
 
+    def _notify_address_location(self):
+        # without debug info only the program counter is known
+        frame = self.process.GetSelectedThread().GetSelectedFrame()
+        if not frame.IsValid():
+            return
+
+        symbol = frame.GetSymbol()
+        self.listener.notify_event(
+            'address_location',
+            pc=frame.GetPC(),
+            function=decode(frame.GetFunctionName()),
+            function_start=symbol.GetStartAddress().GetLoadAddress(
+                self.target) if symbol else None,
+        )
+
+    # the output of crash hunt runs is read to drain it but not sent, the
+    # plugin would only drop it
     def _notify_process_std_out(self, event):
         output = self.process.GetSTDOUT(lldb.UINT32_MAX)
-        if output:
+        if output and self.crash_hunt is None:
             output = output.replace('\r', '')
             self.listener.notify_event(
                 'process_std_out',
@@ -186,7 +814,7 @@ class LldbService(object):
 
     def _notify_process_std_err(self, event):
         output = self.process.GetSTDERR(lldb.UINT32_MAX)
-        if output:
+        if output and self.crash_hunt is None:
             output = output.replace('\r', '')
             self.listener.notify_event(
                 'process_std_err',
@@ -197,6 +825,11 @@ class LldbService(object):
         self.listener.notify_event('error', error=error)
 
 
+def watchpoint_to_dict(entry):
+    return dict(
+        (key, value) for key, value in entry.items() if key != 'type')
+
+
 process_state_names = {
     lldb.eStateAttaching: 'attaching',
     lldb.eStateConnected: 'connected',
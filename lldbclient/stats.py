@@ -0,0 +1,94 @@
+import threading
+import time
+
+
+class BreakpointStats(object):
+    """ Per-breakpoint hit statistics which are reported as deltas """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = set()
+        self._removed = set()
+        self._stopped_ids = []
+        self._stopped_at = None
+
+    def add(self, breakpoint_id, file, line):
+        with self._lock:
+            self._entries[breakpoint_id] = {
+                'id': breakpoint_id,
+                'file': file,
+                'line': line,
+                'hits': 0,
+                'interval': None,
+                'stopped': 0.0,
+                '_last_hit': None,
+                '_total_interval': 0.0,
+            }
+            self._removed.discard(breakpoint_id)
+            self._dirty.add(breakpoint_id)
+
+    def remove(self, breakpoint_id):
+        with self._lock:
+            if self._entries.pop(breakpoint_id, None) is not None:
+                self._dirty.discard(breakpoint_id)
+                self._removed.add(breakpoint_id)
+
+    def find(self, file, line):
+        with self._lock:
+            return [
+                entry['id'] for entry in self._entries.values()
+                if entry['file'] == file and entry['line'] == line
+            ]
+
+    def on_stop(self, breakpoint_ids):
+        now = self._clock()
+        with self._lock:
+            self._stopped_ids = []
+            for breakpoint_id in set(breakpoint_ids):
+                entry = self._entries.get(breakpoint_id)
+                if entry is None:
+                    continue
+
+                if entry['_last_hit'] is not None:
+                    entry['_total_interval'] += now - entry['_last_hit']
+                    entry['interval'] = \
+                        entry['_total_interval'] / entry['hits']
+                entry['_last_hit'] = now
+                entry['hits'] += 1
+                self._stopped_ids.append(breakpoint_id)
+                self._dirty.add(breakpoint_id)
+            self._stopped_at = now if self._stopped_ids else None
+
+    def on_resume(self):
+        now = self._clock()
+        with self._lock:
+            if self._stopped_at is not None:
+                for breakpoint_id in self._stopped_ids:
+                    entry = self._entries.get(breakpoint_id)
+                    if entry is not None:
+                        entry['stopped'] += now - self._stopped_at
+                        self._dirty.add(breakpoint_id)
+            self._stopped_ids = []
+            self._stopped_at = None
+
+    def take_delta(self):
+        """ Returns the entries changed since the last call or None """
+        with self._lock:
+            if not self._dirty and not self._removed:
+                return None
+
+            delta = [
+                dict(
+                    (k, v) for k, v in self._entries[breakpoint_id].items()
+                    if not k.startswith('_')
+                )
+                for breakpoint_id in self._dirty
+            ] + [
+                {'id': breakpoint_id, 'removed': True}
+                for breakpoint_id in self._removed
+            ]
+            self._dirty.clear()
+            self._removed.clear()
+            return delta
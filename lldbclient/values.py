@@ -0,0 +1,66 @@
+import lldb
+
+
+def decode(text):
+    return text.decode('utf-8', 'replace') if text is not None else None
+
+
+def thread_to_dict(thread):
+    return {
+        'index': thread.GetIndexID(),
+        'id': thread.GetThreadID(),
+        'name': decode(thread.GetName()),
+        'stop_reason': stop_reason_names.get(thread.GetStopReason(), 'none'),
+    }
+
+
+def frame_to_dict(frame):
+    line_entry = frame.GetLineEntry()
+    file_spec = line_entry.GetFileSpec()
+    return {
+        'index': frame.GetFrameID(),
+        'pc': frame.GetPC(),
+        'function': decode(frame.GetFunctionName()),
+        'module': decode(frame.GetModule().GetFileSpec().GetFilename()),
+        'file': decode(file_spec.fullpath) if file_spec else None,
+        'line': line_entry.GetLine() if file_spec else None,
+    }
+
+
+def value_to_dict(value):
+    return {
+        'name': decode(value.GetName()),
+        'type': decode(value.GetTypeName()),
+        'value': decode(value.GetValue()),
+        'summary': decode(value.GetSummary()),
+        'num_children': value.GetNumChildren(),
+    }
+
+
+def get_frames(thread, start, count):
+    """ Returns up to count frames and whether there are more frames
+
+    Frames are fetched by index so that only the requested part of the
+    stack gets unwound.
+    """
+    frames = []
+    for index in range(start, start + count):
+        frame = thread.GetFrameAtIndex(index)
+        if not frame.IsValid():
+            return frames, False
+        frames.append(frame_to_dict(frame))
+    return frames, thread.GetFrameAtIndex(start + count).IsValid()
+
+
+stop_reason_names = {
+    lldb.eStopReasonNone: 'none',
+    lldb.eStopReasonTrace: 'trace',
+    lldb.eStopReasonBreakpoint: 'breakpoint',
+    lldb.eStopReasonWatchpoint: 'watchpoint',
+    lldb.eStopReasonSignal: 'signal',
+    lldb.eStopReasonException: 'exception',
+    lldb.eStopReasonExec: 'exec',
+    lldb.eStopReasonPlanComplete: 'plan_complete',
+    lldb.eStopReasonThreadExiting: 'thread_exiting',
+    lldb.eStopReasonInstrumentation: 'instrumentation',
+}
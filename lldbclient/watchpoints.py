@@ -0,0 +1,85 @@
+import threading
+
+
+class WatchpointError(Exception):
+    pass
+
+
+class WatchpointSlots(object):
+    """ Keeps track of the watchpoints occupying hardware slots
+
+    If all slots are taken, the eviction policy decides which watchpoint
+    has to make room for a new one: 'none' refuses to set the new one,
+    'oldest' evicts the watchpoint set first and 'least_hit' the one with
+    the fewest hits.
+    """
+
+    policies = ('none', 'oldest', 'least_hit')
+
+    def __init__(self, slot_count, policy='none'):
+        if policy not in self.policies:
+            raise WatchpointError('Unknown eviction policy %r' % policy)
+
+        self.slot_count = slot_count
+        self.policy = policy
+        self.entries = []
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def reserve(self):
+        """ Returns the watchpoint entry to evict or None if a slot is free """
+        with self._lock:
+            if len(self.entries) < self.slot_count:
+                return None
+            if self.policy == 'oldest':
+                return self.entries[0]
+            if self.policy == 'least_hit':
+                return min(self.entries, key=lambda entry: entry['hits'])
+        raise WatchpointError(
+            'All %i hardware watchpoint slots are in use' % self.slot_count)
+
+    def add(self, entry):
+        with self._lock:
+            entry.setdefault('hits', 0)
+            self.entries.append(entry)
+            self._dirty = True
+
+    def remove(self, watchpoint_id):
+        with self._lock:
+            for entry in self.entries:
+                if entry['id'] == watchpoint_id:
+                    self.entries.remove(entry)
+                    self._dirty = True
+                    return entry
+        return None
+
+    def get(self, watchpoint_id):
+        with self._lock:
+            for entry in self.entries:
+                if entry['id'] == watchpoint_id:
+                    return entry
+        return None
+
+    def on_hit(self, watchpoint_id):
+        with self._lock:
+            for entry in self.entries:
+                if entry['id'] == watchpoint_id:
+                    entry['hits'] += 1
+                    self._dirty = True
+                    return entry
+        return None
+
+    def take_counts(self):
+        """ Returns the hit counts if they changed since the last call """
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return [
+                {
+                    'id': entry['id'],
+                    'description': entry['description'],
+                    'hits': entry['hits'],
+                }
+                for entry in self.entries
+            ]
@@ -0,0 +1,221 @@
+import array
+import bisect
+import os
+import shutil
+import threading
+import time
+
+from queue import Queue
+
+
+class OutputLog(object):
+    """ Process output appended to segment files on disk
+
+    A sparse index keeps the offset of every index_interval-th line, so a
+    line is found by seeking to the closest indexed line and reading
+    forward. Every appended chunk remembers when it arrived and from which
+    stream. Once more than max_segments segments exist, the oldest one is
+    deleted together with its part of the index.
+
+    Chunks are written on a thread of their own, appending only queues
+    them.
+    """
+
+    segment_size = 2 ** 26  # bytes
+    index_interval = 1024  # lines
+    streams = ('stdout', 'stderr')
+
+    def __init__(self, directory, max_segments=16, clock=time.time):
+        self.directory = directory
+        self.max_segments = max_segments
+        self.clock = clock
+        self.line_count = 0
+
+        self._lock = threading.Lock()
+        self._segments = []
+        self._file = None
+        self._partial_line = False
+
+        # (line, segment number, offset) of every index_interval-th line
+        # and of the first line of every segment
+        self._index = []
+        self._index_lines = []
+
+        # the first line that started in each chunk
+        self._chunk_lines = array.array('q')
+        self._chunk_times = array.array('d')
+        self._chunk_streams = bytearray()
+
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+
+        self._queue = Queue()
+        self._writer_thread = threading.Thread(target=self._write_chunks)
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    @property
+    def first_line(self):
+        with self._lock:
+            return self._index_lines[0] if self._index_lines else 0
+
+    def append(self, text, stream='stdout'):
+        if text:
+            self._queue.put((text, stream, self.clock()))
+
+    def flush(self):
+        """ Waits until all appended chunks are written """
+        self._queue.join()
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._queue.get()
+            try:
+                if chunk is None:
+                    return
+                self._write(*chunk)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, text, stream, timestamp):
+        data = text.encode('utf-8')
+        with self._lock:
+            if self._file is None or (not self._partial_line and
+                    self._segments[-1]['size'] >= self.segment_size):
+                self._start_segment()
+
+            segment = self._segments[-1]
+            self._chunk_lines.append(
+                self.line_count + 1 if self._partial_line
+                else self.line_count)
+            self._chunk_times.append(timestamp)
+            self._chunk_streams.append(self.streams.index(stream))
+
+            offset = segment['size']
+            start = 0
+            while True:
+                end = data.find(b'\n', start)
+                if end == -1:
+                    break
+                self.line_count += 1
+                start = end + 1
+                if self.line_count % self.index_interval == 0:
+                    self._add_index(self.line_count, offset + start)
+
+            self._partial_line = start < len(data)
+            self._file.write(data)
+            self._file.flush()
+            segment['size'] += len(data)
+
+    def read_lines(self, start, count):
+        """ Returns up to count (line, time, stream, text) tuples """
+        lines = []
+        for line, text in self._iterate_lines(start):
+            if len(lines) == count:
+                break
+            lines.append((line,) + self.chunk_info(line) + (text,))
+        return lines
+
+    def search(self, pattern, start=0, count=50):
+        """ Returns up to count matches and the line to continue from
+
+        pattern is a compiled regular expression. The line to continue
+        from is None if the whole log was searched.
+        """
+        matches = []
+        for line, text in self._iterate_lines(start):
+            if len(matches) == count:
+                return matches, line
+            if pattern.search(text):
+                matches.append((line,) + self.chunk_info(line) + (text,))
+        return matches, None
+
+    def chunk_info(self, line):
+        """ Returns the time and stream of the chunk a line started in """
+        with self._lock:
+            index = bisect.bisect_right(self._chunk_lines, line) - 1
+            if index < 0:
+                return None, None
+            return (
+                self._chunk_times[index],
+                self.streams[self._chunk_streams[index]],
+            )
+
+    def close(self):
+        self._queue.put(None)
+        self._writer_thread.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _iterate_lines(self, start):
+        with self._lock:
+            if not self._index:
+                return
+            position = max(0, bisect.bisect_right(self._index_lines, start) - 1)
+            line, segment_number, offset = self._index[position]
+            segments = [
+                dict(segment) for segment in self._segments
+                if segment['number'] >= segment_number
+            ]
+            line_count = self.line_count
+
+        for segment in segments:
+            try:
+                f = open(segment['path'], 'rb')
+            except (IOError, OSError):
+                # deleted in the meantime
+                return
+            with f:
+                f.seek(offset)
+                remaining = segment['size'] - offset
+                while remaining > 0:
+                    data = f.readline(remaining)
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    if line >= start and line < line_count:
+                        yield line, data.rstrip(b'\n').decode(
+                            'utf-8', 'replace')
+                    line += 1
+            offset = 0
+
+    def _start_segment(self):
+        if self._file is not None:
+            self._file.close()
+
+        number = self._segments[-1]['number'] + 1 if self._segments else 0
+        path = os.path.join(self.directory, 'output-%05i.log' % number)
+        self._file = open(path, 'wb')
+        self._segments.append({'number': number, 'path': path, 'size': 0})
+        if not self._index_lines or self._index_lines[-1] != self.line_count:
+            self._add_index(self.line_count, 0)
+        else:
+            # the line was indexed as the end of the previous segment
+            self._index[-1] = (self.line_count, number, 0)
+
+        while len(self._segments) > self.max_segments:
+            self._remove_oldest_segment()
+
+    def _add_index(self, line, offset):
+        self._index.append((line, self._segments[-1]['number'], offset))
+        self._index_lines.append(line)
+
+    def _remove_oldest_segment(self):
+        segment = self._segments.pop(0)
+        os.remove(segment['path'])
+
+        position = bisect.bisect_left(
+            [number for _, number, _ in self._index],
+            self._segments[0]['number'],
+        )
+        del self._index[:position]
+        del self._index_lines[:position]
+
+        chunk = max(0, bisect.bisect_right(
+            self._chunk_lines, self._index_lines[0]) - 1)
+        del self._chunk_lines[:chunk]
+        del self._chunk_times[:chunk]
+        del self._chunk_streams[:chunk]
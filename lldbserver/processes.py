@@ -0,0 +1,93 @@
+import os
+import subprocess
+
+
+class ProcessTable(object):
+    """ Cached table of running processes
+
+    On systems with a /proc file system only processes which appeared since
+    the last refresh are read, everything else is kept from the cache. A
+    refresh replaces the table at once, so it can run on another thread
+    than list().
+    """
+
+    proc_directory = '/proc'
+
+    def __init__(self):
+        self.processes = {}
+
+    def refresh(self):
+        if os.path.isdir(self.proc_directory):
+            self._refresh_from_proc()
+        else:
+            self._refresh_from_ps()
+        return self.list()
+
+    def list(self):
+        return sorted(
+            self.processes.values(),
+            key=lambda process: process['pid'],
+            reverse=True,
+        )
+
+    def _refresh_from_proc(self):
+        # pids get reused, together with the start time they identify a
+        # process though
+        keys = set()
+        for entry in os.listdir(self.proc_directory):
+            if entry.isdigit():
+                start_time = self._read_start_time(int(entry))
+                if start_time is not None:
+                    keys.add((int(entry), start_time))
+
+        processes = {}
+        for key in keys:
+            process = self.processes.get(key) or \
+                self._read_proc_entry(key[0])
+            if process is not None:
+                processes[key] = process
+        self.processes = processes
+
+    def _read_start_time(self, pid):
+        path = os.path.join(self.proc_directory, str(pid), 'stat')
+        try:
+            with open(path, 'rb') as f:
+                stat = f.read()
+        except (IOError, OSError):
+            return None
+
+        # the name in field 2 may contain spaces and parentheses, the start
+        # time is field 22
+        fields = stat[stat.rfind(b')') + 2:].split()
+        return int(fields[19]) if len(fields) > 19 else None
+
+    def _read_proc_entry(self, pid):
+        directory = os.path.join(self.proc_directory, str(pid))
+        try:
+            with open(os.path.join(directory, 'comm'), 'rb') as f:
+                name = f.read().decode('utf-8', 'replace').strip()
+            with open(os.path.join(directory, 'cmdline'), 'rb') as f:
+                arguments = f.read().decode('utf-8', 'replace').split('\0')
+        except (IOError, OSError):
+            # the process exited in the meantime or isn't accessible
+            return None
+
+        return {
+            'pid': pid,
+            'name': name,
+            'command_line': ' '.join(arg for arg in arguments if arg),
+        }
+
+    def _refresh_from_ps(self):
+        output = subprocess.check_output(['ps', '-axo', 'pid=,comm=,args='])
+        processes = {}
+        for line in output.decode('utf-8', 'replace').splitlines():
+            fields = line.split(None, 2)
+            if len(fields) >= 2:
+                pid = int(fields[0])
+                processes[pid] = {
+                    'pid': pid,
+                    'name': os.path.basename(fields[1]),
+                    'command_line': fields[2] if len(fields) > 2 else '',
+                }
+        self.processes = processes
@@ -0,0 +1,93 @@
+import collections
+import time
+
+from ipc.recording import read_frames, received
+
+
+def replay(path, service_proxy, realtime=False, clock=time.time):
+    """ Feeds the worker events of a recording into a service proxy
+
+    Events are filtered like the server does it for a live worker. With
+    realtime the recorded gaps between the frames are kept, otherwise the
+    events are replayed as fast as possible. Returns the number of events
+    and how long the replay took.
+    """
+    events = 0
+    last_seq = 0
+    recorded_duration = 0.0
+    start_time = clock()
+
+    for timestamp, direction, event in read_frames(path):
+        if direction != received:
+            continue
+        recorded_duration = timestamp
+
+        if realtime:
+            delay = start_time + timestamp - clock()
+            if delay > 0:
+                time.sleep(delay)
+
+        if event['type'] == 'heartbeat':
+            continue
+        seq = event.pop('seq', None)
+        if seq is not None:
+            if seq <= last_seq:
+                continue
+            last_seq = seq
+
+        service_proxy.notify_event(event)
+        events += 1
+
+    duration = clock() - start_time
+    return {
+        'events': events,
+        'duration': duration,
+        'recorded_duration': recorded_duration,
+        'rate': events / duration if duration else 0.0,
+    }
+
+
+class CountingListener(object):
+    """ Listener which only counts the events by type """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def __getattr__(self, name):
+        def count(**args):
+            self.counts[name] += 1
+
+        return count
+
+
+def main():
+    import argparse
+
+    from .serviceproxy import LldbServiceProxy
+
+    parser = argparse.ArgumentParser(
+        description='Replays a recorded session without lldb and Sublime '
+                    'Text and reports the event throughput.')
+    parser.add_argument('recording')
+    parser.add_argument('--realtime', action='store_true')
+    args = parser.parse_args()
+
+    listener = CountingListener()
+    result = replay(
+        args.recording,
+        LldbServiceProxy(lambda message: None, listener),
+        args.realtime,
+    )
+
+    for name, count in sorted(listener.counts.items()):
+        print('%-30s %i' % (name, count))
+    print('%i events in %.3fs (recorded in %.3fs), %.0f events/s' % (
+        result['events'],
+        result['duration'],
+        result['recorded_duration'],
+        result['rate'],
+    ))
+
+
+if __name__ == '__main__':
+    main()
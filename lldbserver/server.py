@@ -1,10 +1,13 @@
 import os
 import platform
+import socket
 import subprocess
 import tempfile
 import threading
+import time
 
 from ipc.message import ConnectionClosedError
+from ipc.recording import FrameRecorder
 from ipc.server import JsonServer
 
 from .serviceproxy import LldbServiceProxy
@@ -41,6 +44,9 @@ def find_lldb_python_lib_directory():
 class LldbServer(object):
 
     connection_timeout = 5  # time in seconds
+    remote_connection_timeout = 120  # time in seconds
+    reconnect_timeout = 60  # time in seconds
+    heartbeat_interval = 5.0  # time in seconds
 
     def __init__(
         self,
@@ -48,18 +54,164 @@ class LldbServer(object):
         lldb_python_lib_directory,
         server_listener,
         service_listener,
+        server_address=None,
+        remote_worker=False,
+        compress=False,
+        heartbeat_timeout=None,
+        resume=False,
+        worker_pid=None,
+        recording_path=None,
+        last_seq=0,
     ):
-        self.server_address = tempfile.mktemp()
-        self.server = JsonServer(self.server_address)
-        self.server_listener = server_listener
-        self.lldb_service = LldbServiceProxy(
-            self.server.send_json, service_listener)
-        self.process = self._run_client_process(
-            python_binary, lldb_python_lib_directory,
+        self.recorder = FrameRecorder(recording_path) \
+            if recording_path is not None else None
+        self.server = JsonServer(
+            server_address or tempfile.mktemp(),
+            compress,
+            heartbeat_timeout,
+            self.recorder,
         )
-        self.server.wait_for_connection(self.connection_timeout)
-        self._run_listener_thread()
+        self.server_address = self.server.address
+        self.compress = compress
+        self.heartbeat_timeout = heartbeat_timeout
+        self.server_listener = server_listener
+        self.lldb_service = LldbServiceProxy(self._send, service_listener)
         self.running = True
+        self.stopping = False
+        self.detached = False
+        self.connected = False
+        self.pending_messages = []
+        self.send_lock = threading.Lock()
+        # events up to last_seq were handled by a previous server
+        self.last_seq = last_seq
+        self.worker_pid = worker_pid
+
+        if remote_worker or resume:
+            # the worker is either started by the user on another host or
+            # still running from a previous session, it connects back to
+            # the listening address
+            self.process = None
+            self._run_connection_thread(resume)
+        else:
+            self.process = self._run_client_process(
+                python_binary, lldb_python_lib_directory,
+            )
+            self.worker_pid = self.process.pid
+            try:
+                self.server.wait_for_connection(self.connection_timeout)
+            except socket.timeout:
+                self.process.kill()
+                self.server.shutdown()
+                raise
+            self.connected = True
+            self._run_listener_thread()
+
+        if heartbeat_timeout is not None:
+            heartbeat_thread = threading.Thread(target=self._send_heartbeats)
+            heartbeat_thread.daemon = True
+            heartbeat_thread.start()
+
+    def worker_command(self, python_binary='python'):
+        command = [python_binary, 'run-lldb-client.py', self.server_address]
+        if self.compress:
+            command.append('--compress')
+        if self.heartbeat_timeout is not None:
+            command.extend(
+                ['--heartbeat-timeout', str(self.heartbeat_timeout)])
+        return command
+
+    def kill(self):
+        self.stopping = True
+        if self.process is not None:
+            self.process.kill()
+        else:
+            self.lldb_service.stop()
+        # frees the address for the next server
+        self.server.shutdown()
+
+    def detach(self):
+        """ Closes the connection but keeps the worker running
+
+        Returns the information needed to resume the session with a new
+        server, the worker reconnects once the new server is listening.
+        """
+        self.detached = True
+        self.running = False
+        with self.send_lock:
+            self.connected = False
+        self.server.shutdown()
+        self._close_recorder()
+        return {
+            'server_address': self.server_address,
+            'worker_pid': self.worker_pid,
+            'last_seq': self.last_seq,
+            'compress': self.compress,
+            'heartbeat_timeout': self.heartbeat_timeout,
+        }
+
+    def _send(self, message):
+        with self.send_lock:
+            if self.connected:
+                self.server.send_json(message)
+            else:
+                self.pending_messages.append(message)
+
+    def _send_heartbeats(self):
+        # lets the worker notice a dead connection as quickly as the plugin
+        while self.running:
+            time.sleep(self.heartbeat_interval)
+            with self.send_lock:
+                if not self.connected:
+                    continue
+                try:
+                    self.server.send_json({'command': 'heartbeat'})
+                except ConnectionClosedError:
+                    # the listener thread takes care of reconnecting
+                    pass
+
+    def _run_connection_thread(self, resume):
+        connection_thread = threading.Thread(
+            target=self._wait_for_worker, args=(resume,))
+        connection_thread.daemon = True
+        connection_thread.start()
+
+    def _wait_for_worker(self, resume):
+        timeout = self.reconnect_timeout if resume \
+            else self.remote_connection_timeout
+        if self._accept_worker(timeout, resume):
+            self._process_listener_thread()
+        else:
+            print('No worker connected to %s' % self.server_address)
+            self._on_stopped()
+
+    def _accept_worker(self, timeout, resume):
+        deadline = time.time() + timeout
+        while self.running and not self.stopping:
+            try:
+                self.server.wait_for_connection(
+                    min(1.0, max(0.0, deadline - time.time())))
+                break
+            except socket.timeout:
+                if time.time() >= deadline:
+                    return False
+            except (socket.error, OSError):
+                # the listening socket was closed by kill
+                return False
+        else:
+            return False
+
+        with self.send_lock:
+            if resume:
+                # the worker replays all events after last_seq
+                self.server.send_json({
+                    'command': 'resume',
+                    'last_seq': self.last_seq,
+                })
+            for message in self.pending_messages:
+                self.server.send_json(message)
+            del self.pending_messages[:]
+            self.connected = True
+        return True
 
     def _run_client_process(self, python_binary, lldb_python_lib_directory):
         python_path = find_lldb_python_lib_directory() \
@@ -70,7 +222,7 @@ class LldbServer(object):
 
         current_directory = os.path.dirname(os.path.realpath(__file__))
         process = subprocess.Popen(
-            (python_binary, 'run-lldb-client.py', self.server_address),
+            self.worker_command(python_binary),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             env=env,
@@ -93,15 +245,36 @@ class LldbServer(object):
         listener_thread.start()
 
     def _process_listener_thread(self):
-        try:
-            self.server.serve_forever(self._on_event)
-        except ConnectionClosedError:
-            self._on_stopped()
+        while True:
+            try:
+                self.server.serve_forever(self._on_event)
+            except ConnectionClosedError:
+                pass
+
+            with self.send_lock:
+                self.connected = False
+            if self.detached:
+                return
+            if self.stopping or \
+                    not self._accept_worker(self.reconnect_timeout, True):
+                self._on_stopped()
+                return
 
     def _on_event(self, event):
+        if event['type'] == 'heartbeat':
+            return
+
+        seq = event.pop('seq', None)
+        if seq is not None:
+            if seq <= self.last_seq:
+                # already received before the connection was resumed
+                return
+            self.last_seq = seq
+
         self.lldb_service.notify_event(event)
 
         if event['type'] == 'process_state' and event['state'] == 'exited':
+            self.stopping = True
             self.lldb_service.stop()
 
     def _monitor_process_server(self, process):
@@ -130,7 +303,13 @@ class LldbServer(object):
 
         self._on_stopped()
 
+    def _close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+
     def _on_stopped(self):
         if self.running:
             self.running = False
+            self.server.shutdown()
+            self._close_recorder()
             self.server_listener.on_server_stopped()
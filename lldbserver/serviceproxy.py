@@ -1,3 +1,4 @@
+import itertools
 import threading
 import time
 
@@ -10,6 +11,10 @@ class LldbServiceProxy(object):
         self.completion_result = None
         self.completion_condition = threading.Condition()
 
+        self.request_ids = itertools.count(1)
+        self.pending_requests = {}
+        self.pending_requests_lock = threading.Lock()
+
     def __getattr__(self, name):
         def method_proxy(**args):
             message = {'command': name}
@@ -24,9 +29,34 @@ class LldbServiceProxy(object):
         del args['type']
         if event['type'] == 'completion':
             self._on_completion(**args)
+        elif 'request_id' in event:
+            self._on_response(**args)
         else:
             listener_method(**args)
 
+    def request(self, command, callback, **args):
+        """ Sends a command and calls callback with the matching response
+
+        Returns the request id which can be passed to cancel.
+        """
+        request_id = next(self.request_ids)
+        with self.pending_requests_lock:
+            self.pending_requests[request_id] = callback
+
+        message = {'command': command, 'request_id': request_id}
+        message.update(args)
+        self.sender(message)
+        return request_id
+
+    def cancel(self, request_id):
+        """ Drops the callback, returns True if the request was pending
+
+        The worker still finishes the request, its response is ignored.
+        """
+        with self.pending_requests_lock:
+            pending = self.pending_requests.pop(request_id, None)
+        return pending is not None
+
     def handle_completion(self, current_line, cursor_pos, timeout=0.5):
         self.sender({
             'command': 'handle_completion',
@@ -45,6 +75,12 @@ class LldbServiceProxy(object):
 
         return matches
 
+    def _on_response(self, request_id, **args):
+        with self.pending_requests_lock:
+            callback = self.pending_requests.pop(request_id, None)
+        if callback is not None:
+            callback(**args)
+
     def _on_completion(self, matches):
         with self.completion_condition:
             self.completion_result = list(matches)
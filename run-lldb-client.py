@@ -2,14 +2,31 @@
 def main():
     import argparse
 
+    from ipc.recording import FrameRecorder
     from lldbclient.client import LldbClient
 
     parser = argparse.ArgumentParser()
     parser.add_argument('address')
+    parser.add_argument('--compress', action='store_true')
+    parser.add_argument(
+        '--record', metavar='PATH', help='record all frames to PATH')
+    parser.add_argument(
+        '--heartbeat-timeout', metavar='SECONDS', type=float,
+        help='reconnect if the plugin is silent for SECONDS')
     args = parser.parse_args()
 
-    with LldbClient(args.address) as client:
-        client.listen_forever()
+    recorder = FrameRecorder(args.record) if args.record else None
+    try:
+        with LldbClient(
+            args.address,
+            args.compress,
+            recorder,
+            args.heartbeat_timeout,
+        ) as client:
+            client.listen_forever()
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == "__main__":
@@ -1,26 +1,145 @@
+import bisect
+import html
 import json
 import os
+import re
+import shutil
 import sys
+import threading
+import time
 
 from contextlib import contextmanager
 
+plugin_import_time = time.time()
+
 current_directory = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(current_directory)
 
 import sublime
 import sublime_plugin
 
-from lldbserver.server import LldbServer
-
 
 PROMPT = '(lldb) '
 
+page_size = 50
+
 lldb_server = None
 target_run_pointer_map = {}
+run_pointer = None
+breakpoint_stats = {}
+process_table = None
+process_threads = []
+selected_frame = None
+watch_expressions = []
+watch_results = {}
+process_state = None
+hover_cache = {}
+hover_pending = {}
+stop_count = 0
+watchpoints = {}
+disassembly_instructions = []
+disassembly_lines = {}
+disassembly_pc = None
+disassembly_loading = False
+disassembly_generation = 0
+crash_hunt_servers = []
+crash_hunt = {}
+crash_groups = {}
+crash_hunt_generation = 0
+output_log = None
+
+
+load_stats = {}
+breakpoints_cache = {}
 
 
 def plugin_loaded():
-    sublime.set_timeout_async(set_all_breakpoints, 0)
+    # only the visible views get their breakpoints now, all others when
+    # they are activated
+    def render_breakpoints():
+        started = time.time()
+        views = set_visible_breakpoints(sublime.active_window())
+        load_stats['breakpoint_rendering'] = time.time() - started
+        load_stats['breakpoint_rendered_views'] = len(views)
+
+    sublime.set_timeout_async(render_breakpoints, 0)
+
+    session = load_session()
+    if session is not None:
+        sublime.active_window().run_command(
+            'lldb_run', {'resume_session': session})
+
+    load_stats['plugin_load'] = time.time() - plugin_import_time
+
+
+def create_lldb_server(*args, **kwargs):
+    # the server stack is only imported once it's needed for debugging
+    from lldbserver.server import LldbServer
+
+    return LldbServer(*args, **kwargs)
+
+
+def recordings_path():
+    return os.path.join(sublime.cache_path(), 'sublime-lldb', 'recordings')
+
+
+def new_recording_path():
+    directory = recordings_path()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return os.path.join(
+        directory, time.strftime('%Y%m%d-%H%M%S') + '.lldb-frames')
+
+
+def create_output_log(max_segments):
+    from lldbserver.outputlog import OutputLog
+
+    return OutputLog(
+        os.path.join(sublime.cache_path(), 'sublime-lldb', 'output'),
+        max_segments,
+    )
+
+
+def plugin_unloaded():
+    stop_crash_hunt()
+
+    # keeps the worker alive so that the session survives plugin reloads
+    if lldb_server is not None and lldb_server.running:
+        save_session(lldb_server.detach())
+
+
+def session_path():
+    return os.path.join(sublime.cache_path(), 'sublime-lldb', 'session.json')
+
+
+def save_session(session):
+    path = session_path()
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        json.dump(session, f)
+
+
+def load_session():
+    """ Returns the session saved on unload if its worker is still alive """
+    path = session_path()
+    try:
+        with open(path, 'r') as f:
+            session = json.load(f)
+        os.remove(path)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if session['worker_pid'] is not None:
+        try:
+            os.kill(session['worker_pid'], 0)
+        except OSError:
+            return None
+    return session
+
+
+def on_main_thread(callback):
+    return lambda **args: sublime.set_timeout(lambda: callback(**args), 0)
 
 
 class EventListenerDispatcher(object):
@@ -36,21 +155,47 @@ class EventListenerDispatcher(object):
 
 class LldbRun(sublime_plugin.WindowCommand):
 
-    def run(self, executable_path=None, arguments=[], environment=None):
-        if executable_path is None:
+    def run(
+        self,
+        executable_path=None,
+        arguments=[],
+        environment=None,
+        attach_pid=None,
+        attach_name=None,
+        wait_for=False,
+        core_path=None,
+        resume_session=None,
+        init_commands=[],
+        stop_on_init_error=False,
+        replay_path=None,
+        replay_realtime=False,
+    ):
+        if replay_path is not None:
+            self.replay(replay_path, replay_realtime)
+        elif resume_session is not None:
+            self.start_server(resume_session)
+            self.console_log('Resuming debug session')
+        elif attach_pid is not None or attach_name is not None:
+            self.attach(attach_pid, attach_name, wait_for)
+        elif core_path is not None:
+            self.open_core(core_path, executable_path)
+        elif executable_path is None:
             targets = self.targets()
             if len(targets) > 0:
                 self.list_targets(targets)
             else:
                 self.show_executable_path_input(arguments, environment)
         else:
-            self.run_target(executable_path, arguments, environment)
+            self.run_target(
+                executable_path,
+                arguments,
+                environment,
+                init_commands,
+                stop_on_init_error,
+            )
 
     def targets(self):
-        project_data = self.window.project_data()
-        settings = project_data.get('settings', {})
-        lldb_settings = settings.get('sublime-lldb', {})
-        return lldb_settings.get('targets', [])
+        return project_targets(self.window)
 
     def list_targets(self, targets):
         target_executables = [
@@ -65,6 +210,8 @@ class LldbRun(sublime_plugin.WindowCommand):
                         targets[index]['executable_path'],
                         targets[index].get('arguments', []),
                         targets[index].get('environment', None),
+                        targets[index].get('init_commands', []),
+                        targets[index].get('stop_on_init_error', False),
                     )
                 else:
                     self.show_executable_path_input([], None)
@@ -80,32 +227,158 @@ class LldbRun(sublime_plugin.WindowCommand):
             None,
         )
 
-    def run_target(self, executable_path, arguments, environment):
-        global lldb_server
+    def run_target(
+        self,
+        executable_path,
+        arguments,
+        environment,
+        init_commands=[],
+        stop_on_init_error=False,
+    ):
+        lldb_service = self.start_server()
+        target_name = os.path.basename(executable_path)
+        self.console_log('Current executable set to %r' % target_name)
+        lldb_service.create_target(executable_path=executable_path)
+        if init_commands:
+            lldb_service.handle_commands(
+                inputs=init_commands,
+                stop_on_error=stop_on_init_error,
+            )
+        self.set_breakpoints(lldb_service)
+        lldb_service.target_launch(
+            arguments=arguments,
+            environment=environment,
+        )
+
+    def attach(self, pid=None, name=None, wait_for=False):
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        lldb_service = self.start_server()
+        if pid is not None:
+            self.console_log('Attaching to process %i' % pid)
+        else:
+            self.console_log('Waiting for process %r' % name)
+        lldb_service.process_attach(
+            pid=pid,
+            name=name,
+            wait_for=wait_for,
+            load_dependent_modules=settings.get(
+                'attach_load_dependent_modules', False),
+        )
+        # the worker creates the target while attaching
+        self.set_breakpoints(lldb_service)
+
+    def open_core(self, core_path, executable_path):
+        lldb_service = self.start_server()
+        self.console_log('Loading core file %r' % core_path)
+        lldb_service.target_load_core(
+            core_path=core_path,
+            executable_path=executable_path,
+        )
+
+    def replay(self, path, realtime):
+        from lldbserver.replay import replay
+        from lldbserver.serviceproxy import LldbServiceProxy
+
+        self.reset_session()
+        self.console_log('Replaying %r' % path)
+        proxy = LldbServiceProxy(
+            lambda message: None, EventListenerDispatcher(self))
+
+        def run_replay():
+            result = replay(path, proxy, realtime)
+            # queued behind all replayed events, so this includes the time
+            # the main thread needed to handle them
+            sublime.set_timeout(
+                lambda: self.on_replay_finished(result, start_time), 0)
+
+        start_time = time.time()
+        # sleeping between realtime events would block the async thread
+        thread = threading.Thread(target=run_replay)
+        thread.daemon = True
+        thread.start()
+
+    def on_replay_finished(self, result, start_time):
+        duration = time.time() - start_time
+        self.console_log(
+            'Replayed %i events in %s (recorded in %s), '
+            'dispatched in %s, %.0f events/s' % (
+                result['events'],
+                format_duration(result['duration']),
+                format_duration(result['recorded_duration']),
+                format_duration(duration),
+                result['events'] / duration if duration else 0.0,
+            )
+        )
+
+    def reset_session(self):
+        global lldb_server, selected_frame, output_log
 
         self.state = None
+        breakpoint_stats.clear()
+        del process_threads[:]
+        selected_frame = None
+        watch_results.clear()
+        hover_cache.clear()
+        hover_pending.clear()
+        watchpoints.clear()
+        del disassembly_instructions[:]
+        disassembly_lines.clear()
         self.create_console()
 
         if lldb_server is not None:
-            lldb_server.process.kill()
+            lldb_server.kill()
+            lldb_server = None
 
         settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        if output_log is not None:
+            output_log.close()
+        output_log = create_output_log(
+            settings.get('output_log_segments', 16))
+
+    def start_server(self, resume_session=None):
+        global lldb_server
+
+        self.reset_session()
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        recording_path = None
+        if settings.get('record_frames', False):
+            recording_path = new_recording_path()
+            self.console_log('Recording frames to %r' % recording_path)
+
         listener = EventListenerDispatcher(self)
-        lldb_server = LldbServer(
+        if resume_session is not None:
+            lldb_server = create_lldb_server(
+                settings.get('python_binary', 'python'),
+                settings.get('lldb_python_lib_directory', None),
+                listener,
+                listener,
+                server_address=resume_session['server_address'],
+                compress=resume_session['compress'],
+                heartbeat_timeout=resume_session['heartbeat_timeout'],
+                resume=True,
+                worker_pid=resume_session['worker_pid'],
+                recording_path=recording_path,
+                last_seq=resume_session.get('last_seq', 0),
+            )
+            return lldb_server.lldb_service
+
+        lldb_server = create_lldb_server(
             settings.get('python_binary', 'python'),
             settings.get('lldb_python_lib_directory', None),
             listener,
             listener,
+            server_address=settings.get('server_address', None),
+            remote_worker=settings.get('remote_worker', False),
+            compress=settings.get('compress_frames', False),
+            heartbeat_timeout=settings.get('heartbeat_timeout', 30),
+            recording_path=recording_path,
         )
-        lldb_service = lldb_server.lldb_service
-        target_name = os.path.basename(executable_path)
-        self.console_log('Current executable set to %r' % target_name)
-        lldb_service.create_target(executable_path=executable_path)
-        self.set_breakpoints(lldb_service)
-        lldb_service.target_launch(
-            arguments=arguments,
-            environment=environment,
-        )
+        if lldb_server.process is None:
+            self.console_log(
+                'Waiting for a worker, run this next to the lldb Python '
+                'module on the remote host:\n  %s' % ' '.join(
+                    lldb_server.worker_command()))
+        return lldb_server.lldb_service
 
     def set_breakpoints(self, lldb_service):
         for file, breakpoints in load_breakpoints(self.window).items():
@@ -122,6 +395,15 @@ class LldbRun(sublime_plugin.WindowCommand):
         self.window.run_command('show_panel', args={'panel': 'output.lldb'})
 
     def on_process_state(self, state):
+        global process_state, stop_count
+
+        process_state = state
+        if state == 'running':
+            # lookups still in flight belong to the previous stop
+            stop_count += 1
+            hover_cache.clear()
+            hover_pending.clear()
+
         if state == 'stopped':
             self.console.run_command('lldb_console_show_prompt')
         elif state == 'exited':
@@ -131,15 +413,211 @@ class LldbRun(sublime_plugin.WindowCommand):
         self.state = state
         self.console_log('Process state changed %r' % state)
 
+    def on_core_loaded(
+        self,
+        threads,
+        crashed_thread,
+        stop_description,
+        frames,
+        more_frames,
+    ):
+        global selected_frame
+
+        process_threads[:] = threads
+        selected_frame = (crashed_thread, 0)
+        self.console_log('Core file loaded with %i threads' % len(threads))
+        self.console_log('Thread #%i: %s' % (crashed_thread, stop_description))
+        for frame in frames:
+            self.console_log('  ' + format_frame(frame))
+        if more_frames:
+            self.console_log('  ...')
+
+        self.state = 'stopped'
+        self.console.run_command('lldb_console_show_prompt')
+
+    def on_frames(self, thread_index, start, frames, more_frames):
+        if start == 0:
+            self.frames = []
+        self.frames.extend(frames)
+
+        items = [
+            [format_frame(frame), frame['module'] or '']
+            for frame in self.frames
+        ]
+        if more_frames:
+            items.append(['More frames ...', ''])
+
+        def on_done(index):
+            global selected_frame
+
+            if index == len(self.frames) and lldb_server is not None:
+                lldb_server.lldb_service.thread_get_frames(
+                    thread_index=thread_index,
+                    start=len(self.frames),
+                    count=page_size,
+                )
+            elif index != -1 and lldb_server is not None:
+                selected_frame = (thread_index, self.frames[index]['index'])
+                lldb_server.lldb_service.thread_select(
+                    thread_index=thread_index,
+                    frame_index=self.frames[index]['index'],
+                )
+
+        self.window.show_quick_panel(items, on_done, 0, start)
+
+    def on_variables(
+        self,
+        thread_index,
+        frame_index,
+        start,
+        variables,
+        more_variables,
+    ):
+        if start == 0:
+            self.variables = []
+        self.variables.extend(variables)
+
+        items = [
+            [
+                '%s = %s' % (
+                    variable['name'],
+                    variable['summary'] or variable['value'],
+                ),
+                variable['type'] or '',
+            ]
+            for variable in self.variables
+        ]
+        if more_variables:
+            items.append(['More variables ...', ''])
+
+        def on_done(index):
+            if index == len(self.variables) and lldb_server is not None:
+                lldb_server.lldb_service.frame_get_variables(
+                    thread_index=thread_index,
+                    frame_index=frame_index,
+                    start=len(self.variables),
+                    count=page_size,
+                )
+
+        self.window.show_quick_panel(items, on_done, 0, start)
+
+    def on_memory(self, address, data):
+        row_size = 16
+        for offset in range(0, len(data), row_size * 2):
+            row = data[offset:offset + row_size * 2]
+            self.console_log('0x%016x: %s' % (
+                address + offset // 2,
+                ' '.join(row[i:i + 2] for i in range(0, len(row), 2)),
+            ))
+
     def on_location(self, line_entry):
         self.jump_to(line_entry)
+        refresh_watches(self.window)
+
+    def on_address_location(self, pc, function, function_start):
+        global disassembly_pc
+
+        disassembly_pc = pc
+        view = disassembly_view(self.window)
+        self.window.focus_view(view)
+        if pc in disassembly_lines:
+            # already decoded, e.g. when stepping through the same function
+            set_run_pointer(view, disassembly_lines[pc] + 1)
+        else:
+            start = pc
+            if function_start is not None and \
+                    0 <= pc - function_start <= max_disassembly_prefix:
+                start = function_start
+            request_instructions(
+                view, start, (pc - start) // 2 + page_size, reset=True)
+        refresh_watches(self.window)
 
     def on_process_std_out(self, output):
+        output_log.append(output, 'stdout')
         self.console_log(output)
 
     def on_process_std_err(self, output):
+        output_log.append(output, 'stderr')
         self.console_log(output)
 
+    def on_breakpoint_stats(self, delta):
+        files = update_breakpoint_stats(delta)
+        for view in self.window.views():
+            if view.file_name() in files:
+                set_breakpoint_stats_for_view(view)
+
+    def on_profile_finished(self, output_path, hot_functions, overhead):
+        self.console_log(
+            'Profile written to %r: %i samples at %.1f Hz, '
+            '%s mean pause per sample, %.1f%% of run time paused' % (
+                output_path,
+                overhead['samples'],
+                overhead['rate'],
+                format_duration(overhead['mean_pause']),
+                overhead['pause_fraction'] * 100,
+            )
+        )
+
+        def on_done(index):
+            function = hot_functions[index] if index != -1 else None
+            if function is not None and function['file'] is not None:
+                self.window.open_file(
+                    '%s:%i' % (function['file'], function['line']),
+                    sublime.ENCODED_POSITION,
+                )
+
+        self.window.show_quick_panel(
+            [
+                [
+                    function['name'],
+                    '%.1f%% self, %.1f%% total' % (
+                        function['self'] * 100, function['total'] * 100),
+                ]
+                for function in hot_functions
+            ],
+            on_done,
+        )
+
+    def on_watchpoint_set(self, watchpoint, evicted):
+        watchpoints[watchpoint['id']] = watchpoint
+        if evicted is not None:
+            self.on_watchpoint_evicted(evicted)
+        self.console_log('Watchpoint %i set on %s (%i bytes at 0x%x)' % (
+            watchpoint['id'],
+            watchpoint['description'],
+            watchpoint['size'],
+            watchpoint['address'],
+        ))
+
+    def on_watchpoint_evicted(self, watchpoint):
+        watchpoints.pop(watchpoint['id'], None)
+        self.console_log('Watchpoint %i on %s evicted' % (
+            watchpoint['id'], watchpoint['description']))
+
+    def on_watchpoint_hit(self, watchpoint, old_value, new_value, frame):
+        watchpoints[watchpoint['id']] = watchpoint
+        message = 'Watchpoint %i hit: %s changed from %s to %s' % (
+            watchpoint['id'], watchpoint['description'], old_value, new_value)
+        self.console_log(message)
+        self.console_log('  ' + format_frame(frame))
+        sublime.status_message(message)
+
+    def on_watchpoint_stats(self, counts):
+        for entry in counts:
+            if entry['id'] in watchpoints:
+                watchpoints[entry['id']]['hits'] = entry['hits']
+
+    def on_commands_finished(self, results, success):
+        self.console_log('\n'.join(
+            PROMPT + result['input'] + '\n' + (result['output'] or '')
+            for result in results
+        ))
+        if not success:
+            self.console_log('Some commands failed')
+
+        if self.state == 'stopped':
+            self.console.run_command('lldb_console_show_prompt')
+
     def on_command_finished(self, output, success):
         self.console_log(output)
 
@@ -169,6 +647,317 @@ class LldbRun(sublime_plugin.WindowCommand):
             set_run_pointer(view, line_entry['line'])
 
 
+class LldbAttach(sublime_plugin.WindowCommand):
+
+    def run(self, pid=None, name=None, wait_for=False):
+        if pid is not None or name is not None:
+            self.attach(pid, name, wait_for)
+        else:
+            self.list_processes()
+
+    def list_processes(self):
+        global process_table
+
+        if process_table is None:
+            from lldbserver.processes import ProcessTable
+
+            process_table = ProcessTable()
+
+        if not process_table.processes:
+            # nothing cached to show yet
+            def refresh():
+                processes = process_table.refresh()
+                sublime.set_timeout(lambda: self.show_processes(processes), 0)
+
+            sublime.set_timeout_async(refresh, 0)
+            return
+
+        # the list is refreshed for the next time, new processes are
+        # missing until then
+        self.show_processes(process_table.list())
+        sublime.set_timeout_async(process_table.refresh, 0)
+
+    def show_processes(self, processes):
+        items = [['Wait for process name ...', '']] + [
+            [process['name'], '%i  %s' % (
+                process['pid'], process['command_line'])]
+            for process in processes
+        ]
+
+        def on_done(index):
+            if index == 0:
+                self.show_process_name_input()
+            elif index > 0:
+                self.attach(pid=processes[index - 1]['pid'])
+
+        self.window.show_quick_panel(items, on_done)
+
+    def show_process_name_input(self):
+        self.window.show_input_panel(
+            'Wait for process name',
+            '',
+            lambda input: self.attach(name=input, wait_for=True),
+            None,
+            None,
+        )
+
+    def attach(self, pid=None, name=None, wait_for=False):
+        self.window.run_command('lldb_run', {
+            'attach_pid': pid,
+            'attach_name': name,
+            'wait_for': wait_for,
+        })
+
+
+class LldbOpenCore(sublime_plugin.WindowCommand):
+
+    def run(self, core_path=None, executable_path=None):
+        if core_path is None:
+            self.window.show_input_panel(
+                'Enter core file path',
+                '',
+                self.show_executable_path_input,
+                None,
+                None,
+            )
+        else:
+            self.open_core(core_path, executable_path)
+
+    def show_executable_path_input(self, core_path):
+        self.window.show_input_panel(
+            'Enter executable path (optional)',
+            '',
+            lambda input: self.open_core(core_path, input or None),
+            None,
+            None,
+        )
+
+    def open_core(self, core_path, executable_path):
+        self.window.run_command('lldb_run', {
+            'core_path': core_path,
+            'executable_path': executable_path,
+        })
+
+
+class LldbReplayRecording(sublime_plugin.WindowCommand):
+
+    def run(self, path=None, realtime=False):
+        if path is None:
+            self.window.show_input_panel(
+                'Replay recording',
+                self.latest_recording(),
+                lambda input: self.run(input, realtime),
+                None,
+                None,
+            )
+        else:
+            self.window.run_command('lldb_run', {
+                'replay_path': path,
+                'replay_realtime': realtime,
+            })
+
+    def latest_recording(self):
+        directory = recordings_path()
+        if not os.path.isdir(directory):
+            return ''
+        names = sorted(os.listdir(directory))
+        return os.path.join(directory, names[-1]) if names else ''
+
+
+class LldbShowThreads(sublime_plugin.WindowCommand):
+
+    def run(self):
+        def on_done(index):
+            if index != -1 and lldb_server is not None:
+                lldb_server.lldb_service.thread_get_frames(
+                    thread_index=process_threads[index]['index'],
+                    start=0,
+                    count=page_size,
+                )
+
+        self.window.show_quick_panel(
+            [
+                [
+                    'Thread #%i %s' % (thread['index'], thread['name'] or ''),
+                    'tid 0x%x, stop reason: %s' % (
+                        thread['id'], thread['stop_reason']),
+                ]
+                for thread in process_threads
+            ],
+            on_done,
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None and len(process_threads) > 0
+
+
+class LldbShowVariables(sublime_plugin.WindowCommand):
+
+    def run(self):
+        thread_index, frame_index = selected_frame
+        lldb_server.lldb_service.frame_get_variables(
+            thread_index=thread_index,
+            frame_index=frame_index,
+            start=0,
+            count=page_size,
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None and selected_frame is not None
+
+
+class LldbReadMemory(sublime_plugin.WindowCommand):
+
+    def run(self):
+        self.window.show_input_panel(
+            'Enter address and size',
+            '',
+            self.on_done,
+            None,
+            None,
+        )
+
+    def on_done(self, input):
+        address, _, size = input.partition(' ')
+        lldb_server.lldb_service.process_read_memory(
+            address=int(address, 0),
+            size=int(size or '64', 0),
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None
+
+
+class LldbAddWatch(sublime_plugin.WindowCommand):
+
+    def run(self, expression=None):
+        if expression is None:
+            view = self.window.active_view()
+            selection = view.sel()[0] if view and len(view.sel()) else None
+            initial_text = ''
+            if selection is not None:
+                initial_text = view.substr(
+                    selection if not selection.empty()
+                    else view.word(selection)
+                ).strip()
+
+            self.window.show_input_panel(
+                'Watch expression',
+                initial_text,
+                self.add,
+                None,
+                None,
+            )
+        else:
+            self.add(expression)
+
+    def add(self, expression):
+        if expression and expression not in watch_expressions:
+            watch_expressions.append(expression)
+        render_watches(self.window)
+        refresh_watches(self.window)
+        self.window.run_command(
+            'show_panel', args={'panel': 'output.lldb_watch'})
+
+
+class LldbRemoveWatch(sublime_plugin.WindowCommand):
+
+    def run(self):
+        def on_done(index):
+            if index != -1:
+                watch_results.pop(watch_expressions.pop(index), None)
+                render_watches(self.window)
+
+        self.window.show_quick_panel(list(watch_expressions), on_done)
+
+    def is_enabled(self):
+        return len(watch_expressions) > 0
+
+
+class LldbShowWatches(sublime_plugin.WindowCommand):
+
+    def run(self):
+        render_watches(self.window)
+        self.window.run_command(
+            'show_panel', args={'panel': 'output.lldb_watch'})
+
+
+class LldbSetWatchpoint(sublime_plugin.WindowCommand):
+    """ Watches a variable path or an address given as address[:size] """
+
+    def run(self, read=False, write=True):
+        self.window.show_input_panel(
+            'Watch variable or address',
+            '',
+            lambda input: self.set_watchpoint(input.strip(), read, write),
+            None,
+            None,
+        )
+
+    def set_watchpoint(self, input, read, write):
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        policy = settings.get('watchpoint_eviction_policy', 'none')
+        if input[:1].isdigit():
+            address, _, size = input.partition(':')
+            lldb_server.lldb_service.watchpoint_set(
+                address=int(address, 0),
+                size=int(size, 0) if size else None,
+                read=read,
+                write=write,
+                policy=policy,
+            )
+        elif input:
+            lldb_server.lldb_service.watchpoint_set(
+                variable=input,
+                read=read,
+                write=write,
+                policy=policy,
+            )
+
+    def is_enabled(self):
+        return lldb_server is not None and process_state == 'stopped'
+
+
+class LldbListWatchpoints(sublime_plugin.WindowCommand):
+
+    def run(self, delete=False):
+        entries = sorted(watchpoints.values(), key=lambda w: w['id'])
+
+        def on_done(index):
+            if delete and index != -1 and lldb_server is not None:
+                watchpoint_id = entries[index]['id']
+                lldb_server.lldb_service.watchpoint_delete(
+                    watchpoint_id=watchpoint_id)
+                del watchpoints[watchpoint_id]
+
+        self.window.show_quick_panel(
+            [
+                [
+                    'Watchpoint %i: %s' % (entry['id'], entry['description']),
+                    '%i hits, value %s' % (entry['hits'], entry['value']),
+                ]
+                for entry in entries
+            ],
+            on_done,
+        )
+
+    def is_enabled(self):
+        return len(watchpoints) > 0
+
+
+class LldbRunCommands(sublime_plugin.WindowCommand):
+    """ Runs a list of lldb commands in a single round trip """
+
+    def run(self, commands, stop_on_error=False):
+        lldb_server.lldb_service.handle_commands(
+            inputs=commands,
+            stop_on_error=stop_on_error,
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None
+
+
 class LldbKill(sublime_plugin.WindowCommand):
 
     def run(self):
@@ -178,13 +967,613 @@ class LldbKill(sublime_plugin.WindowCommand):
         return lldb_server is not None
 
 
-def remove_run_pointer(window):
+class LldbStep(sublime_plugin.WindowCommand):
+
+    def run(self, kind):
+        lldb_server.lldb_service.thread_step(kind=kind)
+
+    def is_enabled(self):
+        return lldb_server is not None
+
+
+class LldbContinue(sublime_plugin.WindowCommand):
+
+    def run(self):
+        lldb_server.lldb_service.process_continue()
+
+    def is_enabled(self):
+        return lldb_server is not None and process_state == 'stopped'
+
+
+class LldbProfileStart(sublime_plugin.WindowCommand):
+
+    def run(self):
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        lldb_server.lldb_service.profile_start(
+            rate=settings.get('profile_sample_rate', 100))
+
+    def is_enabled(self):
+        return lldb_server is not None
+
+
+class LldbProfileStop(sublime_plugin.WindowCommand):
+
+    def run(self):
+        lldb_server.lldb_service.profile_stop(
+            output_path=project_file_path(
+                self.window, '.lldb-profile.collapsed'))
+
+    def is_enabled(self):
+        return lldb_server is not None
+
+
+class LldbRunUntilCrash(sublime_plugin.WindowCommand):
+
+    def run(
+        self,
+        executable_path=None,
+        arguments=[],
+        environment=None,
+        runs=None,
+        workers=None,
+    ):
+        if executable_path is None:
+            self.list_targets(runs, workers)
+            return
+
+        global crash_hunt_generation
+
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        runs = runs or settings.get('crash_hunt_runs', 1000)
+        if not workers:
+            import multiprocessing
+
+            workers = settings.get('crash_hunt_workers', 0) or \
+                multiprocessing.cpu_count()
+        workers = min(workers, runs)
+
+        stop_crash_hunt()
+        crash_hunt_generation += 1
+        crash_groups.clear()
+        crash_hunt.clear()
+        crash_hunt.update({
+            'executable_path': executable_path,
+            'runs': runs,
+            'workers': workers,
+            'progress': {},
+            'crashes': 0,
+            'running': set(),
+            'errors': [],
+        })
+
+        core_directory = None
+        if settings.get('crash_hunt_save_cores', True):
+            core_directory = os.path.join(
+                sublime.cache_path(), 'sublime-lldb', 'cores')
+            # the cores of the previous hunt belong to the crash groups
+            # cleared above
+            if os.path.isdir(core_directory):
+                shutil.rmtree(core_directory, ignore_errors=True)
+            os.makedirs(core_directory)
+
+        render_crash_summary(self.window)
+        self.window.run_command(
+            'show_panel', args={'panel': 'output.lldb_crashes'})
+
+        # starting a worker waits for it to connect, which would block
+        # the async thread for every worker
+        thread = threading.Thread(target=self.start_workers, args=(
+            crash_hunt_generation,
+            executable_path,
+            arguments,
+            environment,
+            runs,
+            workers,
+            core_directory,
+        ))
+        thread.daemon = True
+        thread.start()
+
+    def list_targets(self, runs, workers):
+        targets = [
+            target for target in project_targets(self.window)
+            if target.get('executable_path', None)
+        ]
+
+        def on_done(index):
+            if index != -1:
+                self.run(
+                    targets[index]['executable_path'],
+                    targets[index].get('arguments', []),
+                    targets[index].get('environment', None),
+                    runs,
+                    workers,
+                )
+
+        if targets:
+            self.window.show_quick_panel(
+                [target['executable_path'] for target in targets], on_done)
+        else:
+            self.window.show_input_panel(
+                'Enter executable path',
+                '',
+                lambda input: self.run(input, runs=runs, workers=workers),
+                None,
+                None,
+            )
+
+    def start_workers(
+        self,
+        generation,
+        executable_path,
+        arguments,
+        environment,
+        runs,
+        workers,
+        core_directory,
+    ):
+        settings = sublime.load_settings('sublime-lldb.sublime-settings')
+        cores_per_signature = settings.get(
+            'crash_hunt_cores_per_signature', 3)
+        for index in range(workers):
+            if generation != crash_hunt_generation:
+                return
+
+            crash_listener = CrashHuntListener(self.window, generation, index)
+            listener = EventListenerDispatcher(crash_listener)
+            try:
+                # each worker gets its own local socket, the address and
+                # remote worker settings only apply to debug sessions
+                server = create_lldb_server(
+                    settings.get('python_binary', 'python'),
+                    settings.get('lldb_python_lib_directory', None),
+                    listener,
+                    listener,
+                )
+            except Exception as e:
+                listener.on_error(error='Couldn\'t start worker: %s' % e)
+                continue
+
+            if generation != crash_hunt_generation:
+                server.kill()
+                return
+            crash_listener.server = server
+            crash_hunt_servers.append(server)
+            crash_hunt['running'].add(index)
+
+            server.lldb_service.create_target(executable_path=executable_path)
+            server.lldb_service.run_until_crash(
+                arguments=arguments,
+                environment=environment,
+                # the remaining runs are spread over the first workers
+                run_limit=runs // workers + (index < runs % workers),
+                core_directory=core_directory,
+                cores_per_signature=cores_per_signature,
+            )
+
+
+class LldbStopCrashHunt(sublime_plugin.WindowCommand):
+
+    def run(self):
+        global crash_hunt_generation
+
+        crash_hunt_generation += 1
+        stop_crash_hunt()
+        crash_hunt['running'].clear()
+        render_crash_summary(self.window)
+
+    def is_enabled(self):
+        return len(crash_hunt_servers) > 0
+
+
+class CrashHuntListener(object):
+    """ Collects the crashes reported by one worker of the crash hunt """
+
+    def __init__(self, window, generation, worker_index):
+        self.window = window
+        self.generation = generation
+        self.worker_index = worker_index
+        self.server = None
+
+    def on_crash_found(
+        self,
+        run,
+        signature,
+        description,
+        crashed_thread,
+        threads,
+        core_path,
+        core_error,
+    ):
+        if self.generation != crash_hunt_generation:
+            return
+
+        group = crash_groups.setdefault(signature, {
+            'signature': signature,
+            'count': 0,
+            'description': description,
+            'crashed_thread': crashed_thread,
+            'threads': threads,
+            'core_paths': [],
+        })
+        group['count'] += 1
+        if core_path is not None:
+            settings = sublime.load_settings('sublime-lldb.sublime-settings')
+            if len(group['core_paths']) < settings.get(
+                    'crash_hunt_cores_per_signature', 3):
+                group['core_paths'].append(core_path)
+            else:
+                # every worker keeps its own count, drop the surplus
+                try:
+                    os.remove(core_path)
+                except OSError:
+                    pass
+        if core_error is not None:
+            self.on_error('Couldn\'t save core file: %s' % core_error)
+        crash_hunt['crashes'] += 1
+        render_crash_summary(self.window)
+
+    def on_crash_hunt_progress(self, runs, crashes):
+        if self.generation == crash_hunt_generation:
+            crash_hunt['progress'][self.worker_index] = runs
+            render_crash_summary(self.window)
+
+    def on_crash_hunt_finished(self, runs, crashes):
+        self.on_crash_hunt_progress(runs, crashes)
+        if self.server is not None:
+            self.server.kill()
+
+    def on_server_stopped(self):
+        if self.generation == crash_hunt_generation:
+            crash_hunt['running'].discard(self.worker_index)
+            render_crash_summary(self.window)
+
+    def on_error(self, error):
+        if self.generation == crash_hunt_generation and \
+                error not in crash_hunt['errors']:
+            crash_hunt['errors'].append(error)
+            render_crash_summary(self.window)
+
+    def on_process_std_out(self, output):
+        pass
+
+    def on_process_std_err(self, output):
+        pass
+
+
+def stop_crash_hunt():
+    for server in crash_hunt_servers:
+        if server.running:
+            server.kill()
+    del crash_hunt_servers[:]
+
+
+max_listed_core_paths = 3
+
+
+def render_crash_summary(window):
+    lines = [
+        'Run until crash: %s' % crash_hunt['executable_path'],
+        '%i of %i runs, %i crashes, %i of %i workers running' % (
+            sum(crash_hunt['progress'].values()),
+            crash_hunt['runs'],
+            crash_hunt['crashes'],
+            len(crash_hunt['running']),
+            crash_hunt['workers'],
+        ),
+    ]
+    lines.extend(crash_hunt['errors'])
+
+    groups = sorted(
+        crash_groups.values(), key=lambda group: group['count'], reverse=True)
+    for group in groups:
+        lines.append('')
+        lines.append('%ix %s' % (group['count'], group['signature']))
+        lines.append('  Thread #%i: %s' % (
+            group['crashed_thread'], group['description']))
+        for thread in group['threads']:
+            if thread['index'] == group['crashed_thread']:
+                lines.extend(
+                    '    ' + format_frame(frame) for frame in thread['frames'])
+        core_paths = group['core_paths']
+        if core_paths:
+            lines.append('  Core files: %s%s' % (
+                ', '.join(core_paths[:max_listed_core_paths]),
+                ' and %i more' % (len(core_paths) - max_listed_core_paths)
+                    if len(core_paths) > max_listed_core_paths else '',
+            ))
+
+    panel = output_panel(window, 'lldb_crashes')
+    panel.run_command('lldb_replace_text', {'text': '\n'.join(lines)})
+
+
+class LldbFilterOutput(sublime_plugin.WindowCommand):
+
+    def run(self, pattern=None):
+        if pattern is None:
+            self.window.show_input_panel(
+                'Filter process output (regular expression)',
+                '',
+                lambda input: self.run(pattern=input),
+                None,
+                None,
+            )
+            return
+
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            sublime.status_message('Invalid regular expression: %s' % e)
+            return
+
+        self.matches = []
+        log = output_log
+        sublime.set_timeout_async(
+            lambda: self.search(log, regex, log.first_line), 0)
+
+    def search(self, log, regex, start):
+        # runs on the async thread, the log may be hundreds of MB
+        log.flush()
+        matches, next_line = log.search(regex, start, page_size)
+        sublime.set_timeout(
+            lambda: self.show_matches(log, regex, matches, next_line), 0)
+
+    def show_matches(self, log, regex, matches, next_line):
+        start = len(self.matches)
+        self.matches.extend(matches)
+        if not self.matches:
+            sublime.status_message('No output matches %r' % regex.pattern)
+            return
+
+        items = [
+            [text, '%s  %s  line %i' % (
+                format_time(timestamp), stream, line + 1)]
+            for line, timestamp, stream, text in self.matches
+        ]
+        if next_line is not None:
+            items.append(['More matches ...', ''])
+
+        def on_done(index):
+            if index == len(self.matches):
+                sublime.set_timeout_async(
+                    lambda: self.search(log, regex, next_line), 0)
+            elif index != -1:
+                show_output_lines(self.window, log, self.matches[index][0])
+
+        self.window.show_quick_panel(items, on_done, 0, start)
+
+    def is_enabled(self):
+        return output_log is not None
+
+
+def format_time(timestamp):
+    if timestamp is None:
+        return ''
+    return '%s.%03i' % (
+        time.strftime('%H:%M:%S', time.localtime(timestamp)),
+        timestamp % 1 * 1000,
+    )
+
+
+def scratch_view(window, name):
+    """ Returns the read only view with the given name, creating it """
     for view in window.views():
+        if view.name() == name:
+            return view
+
+    view = window.new_file()
+    view.set_name(name)
+    view.set_scratch(True)
+    view.set_read_only(True)
+    view.settings().set('line_numbers', False)
+    return view
+
+
+def output_panel(window, name):
+    """ Returns the read only output panel with the given name """
+    panel = window.find_output_panel(name)
+    if panel is None:
+        panel = window.create_output_panel(name)
+        panel.set_name(name.replace('_', '-'))
+        panel.settings().set('line_numbers', False)
+        panel.set_scratch(True)
+        panel.set_read_only(True)
+    return panel
+
+
+def output_view(window):
+    return scratch_view(window, 'lldb-output')
+
+
+def show_output_lines(window, log, line):
+    """ Shows the lines around line from the log instead of the whole log """
+    start = max(log.first_line, line - page_size)
+    lines = log.read_lines(start, 2 * page_size + 1)
+
+    view = output_view(window)
+    view.run_command('lldb_replace_text', {'text': '\n'.join(
+        '%s %s  %s' % (format_time(timestamp), stream, text)
+        for _, timestamp, stream, text in lines
+    )})
+    window.focus_view(view)
+
+    row = line - start
+    region = view.line(view.text_point(row, 0))
+    view.add_regions(
+        'lldb_output_match',
+        [region],
+        'string',
+        '',
+        sublime.DRAW_NO_FILL,
+    )
+    view.show_at_center(region)
+
+
+def evaluate(expression, callback):
+    settings = sublime.load_settings('sublime-lldb.sublime-settings')
+    timeout = settings.get('evaluate_timeout', 2.0)
+    thread_index, frame_index = selected_frame or (None, None)
+    lldb_service = lldb_server.lldb_service
+    request_id = lldb_service.request(
+        'evaluate',
+        on_main_thread(callback),
+        expression=expression,
+        thread_index=thread_index,
+        frame_index=frame_index,
+        timeout=timeout,
+    )
+
+    # the lldb timeout stops the evaluation in the worker, this only makes
+    # sure the callback gets an answer if the response doesn't arrive
+    def on_timeout():
+        if lldb_service.cancel(request_id):
+            callback(result={'error': 'Evaluation timed out'}, cached=False)
+
+    # leave some time for the transport on top of the evaluation timeout
+    sublime.set_timeout(on_timeout, int(timeout * 1000) + 500)
+
+
+def format_value(value):
+    if 'error' in value:
+        return value['error'].strip()
+    text = value['summary'] or value['value'] or ''
+    if value['type']:
+        text += ' (%s)' % value['type']
+    return text
+
+
+def refresh_watches(window):
+    if lldb_server is None:
+        return
+
+    for expression in watch_expressions:
+        def on_result(result, cached, expression=expression):
+            watch_results[expression] = result
+            render_watches(window)
+
+        evaluate(expression, on_result)
+
+
+def render_watches(window):
+    lines = []
+    for expression in watch_expressions:
+        result = watch_results.get(expression)
+        lines.append('%s = %s' % (
+            expression, format_value(result) if result else '...'))
+        for child in (result or {}).get('children', []):
+            lines.append('    %s = %s' % (child['name'], format_value(child)))
+
+    panel = output_panel(window, 'lldb_watch')
+    panel.run_command('lldb_replace_text', {'text': '\n'.join(lines)})
+
+
+max_disassembly_prefix = 2 ** 12  # bytes before the pc to disassemble
+
+
+def disassembly_view(window):
+    return scratch_view(window, 'lldb-disassembly')
+
+
+def request_instructions(view, address, count, reset=False):
+    global disassembly_generation, disassembly_loading
+
+    if lldb_server is None or (disassembly_loading and not reset):
+        return
+    if reset:
+        disassembly_generation += 1
+        del disassembly_instructions[:]
+        disassembly_lines.clear()
+    disassembly_loading = True
+    generation = disassembly_generation
+
+    def on_instructions(address, instructions):
+        global disassembly_loading
+
+        if generation != disassembly_generation:
+            # the pc moved elsewhere in the meantime
+            return
+        disassembly_loading = False
+        disassembly_instructions.extend(instructions)
+        render_disassembly(view)
+
+        if instructions and disassembly_pc is not None and \
+                disassembly_instructions[0]['address'] <= disassembly_pc and \
+                disassembly_pc >= next_instruction_address():
+            request_instructions(view, next_instruction_address(), page_size)
+
+    lldb_server.lldb_service.request(
+        'read_instructions',
+        on_main_thread(on_instructions),
+        address=address,
+        count=count,
+    )
+
+
+def next_instruction_address():
+    last = disassembly_instructions[-1]
+    return last['address'] + last['size']
+
+
+def format_instruction(instruction):
+    location = ''
+    if instruction['symbol'] is not None:
+        location = ' <%s+%i>' % (instruction['symbol'], instruction['offset'])
+    text = '0x%016x%s: %-8s %s' % (
+        instruction['address'],
+        location,
+        instruction['mnemonic'],
+        instruction['operands'],
+    )
+    if instruction['comment']:
+        text += ' ; ' + instruction['comment']
+    return text
+
+
+def render_disassembly(view):
+    global run_pointer
+
+    disassembly_lines.clear()
+    for line, instruction in enumerate(disassembly_instructions):
+        disassembly_lines[instruction['address']] = line
+
+    # the region wouldn't follow the replaced text, so it has to be drawn
+    # again even if the pc ends up on the same line
+    if run_pointer is not None and run_pointer[0] == view.id():
         view.erase_regions('run_pointer')
+        run_pointer = None
+    view.run_command('lldb_replace_text', {'text': '\n'.join(
+        format_instruction(i) for i in disassembly_instructions)})
+    if disassembly_pc in disassembly_lines:
+        line = disassembly_lines[disassembly_pc]
+        set_run_pointer(view, line + 1)
+        view.show(view.text_point(line, 0))
+
+
+def format_frame(frame):
+    text = 'frame #%i: 0x%016x %s' % (
+        frame['index'], frame['pc'], frame['function'] or '???')
+    if frame['file'] is not None:
+        text += ' at %s:%i' % (os.path.basename(frame['file']), frame['line'])
+    return text
+
+
+def remove_run_pointer(window):
+    global run_pointer
+
+    if run_pointer is not None:
+        sublime.View(run_pointer[0]).erase_regions('run_pointer')
+        run_pointer = None
 
 
 def set_run_pointer(view, line):
+    global run_pointer
+
+    if run_pointer == (view.id(), line):
+        return
+
+    # only the view showing the previous run pointer needs to be redrawn
     remove_run_pointer(view.window())
+    run_pointer = (view.id(), line)
     region = view.line(view.text_point(line - 1, 0))
     view.add_regions(
         'run_pointer',
@@ -210,12 +1599,66 @@ def set_breakpoints_for_view(view, breakpoints):
     )
 
 
-def set_all_breakpoints():
-    window = sublime.active_window()
+def format_duration(seconds):
+    if seconds < 1:
+        return '%.1f ms' % (seconds * 1000)
+    return '%.2f s' % seconds
+
+
+def format_breakpoint_stats(entry):
+    text = '%i hits' % entry['hits']
+    if entry['interval'] is not None:
+        text += ', every %s' % format_duration(entry['interval'])
+    if entry['stopped'] > 0:
+        text += ', %s stopped' % format_duration(entry['stopped'])
+    return text
+
+
+def update_breakpoint_stats(delta):
+    """ Returns the files whose statistics changed """
+    files = set()
+    for entry in delta:
+        for key, value in list(breakpoint_stats.items()):
+            if value['id'] == entry['id']:
+                # removed entries only carry the id
+                files.add(key[0])
+                del breakpoint_stats[key]
+        if not entry.get('removed', False):
+            files.add(entry['file'])
+            breakpoint_stats[(entry['file'], entry['line'])] = entry
+    return files
+
+
+def set_breakpoint_stats_for_view(view):
+    entries = [
+        entry for (file, _), entry in breakpoint_stats.items()
+        if file == view.file_name() and entry['hits'] > 0
+    ]
+
+    view.erase_regions('breakpoint_stats')
+    if entries:
+        view.add_regions(
+            'breakpoint_stats',
+            [view.line(view.text_point(e['line'] - 1, 0)) for e in entries],
+            'comment',
+            flags=sublime.HIDDEN,
+            annotations=[format_breakpoint_stats(e) for e in entries],
+        )
+
+
+def set_visible_breakpoints(window):
+    """ Returns the views which got their breakpoints """
     breakpoints = load_breakpoints(window)
 
-    for view in window.views():
-        set_breakpoints_for_view(view, breakpoints.get(view.file_name(), []))
+    views = [
+        window.active_view_in_group(group)
+        for group in range(window.num_groups())
+    ]
+    for view in views:
+        if view is not None:
+            set_breakpoints_for_view(
+                view, breakpoints.get(view.file_name(), []))
+    return views
 
 
 def get_breakpoints(view):
@@ -223,15 +1666,23 @@ def get_breakpoints(view):
     return [view.rowcol(region.a)[0] for region in regions]
 
 
-def breakpoint_settings_path(window):
+def project_targets(window):
+    project_data = window.project_data() or {}
+    settings = project_data.get('settings', {})
+    lldb_settings = settings.get('sublime-lldb', {})
+    return lldb_settings.get('targets', [])
+
+
+def project_file_path(window, filename):
     project_path = window.extract_variables().get('project_path')
     if project_path is None:
         project_path = os.path.expanduser('~')
 
-    return os.path.join(
-        project_path,
-        '.lldb-breakpoints',
-    )
+    return os.path.join(project_path, filename)
+
+
+def breakpoint_settings_path(window):
+    return project_file_path(window, '.lldb-breakpoints')
 
 
 def save_breakpoints(view):
@@ -242,21 +1693,34 @@ def save_breakpoints(view):
     else:
         breakpoints_dict.pop(view.file_name())
 
-    with open(breakpoint_settings_path(view.window()), 'w') as f:
-        return json.dump(breakpoints_dict, f)
+    write_breakpoints(view.window(), breakpoints_dict)
+
+
+def write_breakpoints(window, breakpoints_dict):
+    path = breakpoint_settings_path(window)
+    with open(path, 'w') as f:
+        json.dump(breakpoints_dict, f)
+    breakpoints_cache[path] = (os.stat(path).st_mtime, breakpoints_dict)
 
 
 def load_breakpoints(window):
+    """ Returns the breakpoints file contents, cached until it changes """
+    path = breakpoint_settings_path(window)
     try:
-        with open(breakpoint_settings_path(window), 'r') as f:
-            return json.load(f)
+        mtime = os.stat(path).st_mtime
     except FileNotFoundError:
         return {}
 
+    cached = breakpoints_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r') as f:
+            cached = (mtime, json.load(f))
+        breakpoints_cache[path] = cached
+    return dict(cached[1])
+
 
 def clear_breakpoints(window):
-    with open(breakpoint_settings_path(window), 'w') as f:
-        return json.dump({}, f)
+    write_breakpoints(window, {})
 
 
 class LldbListBreakpoints(sublime_plugin.WindowCommand):
@@ -264,13 +1728,22 @@ class LldbListBreakpoints(sublime_plugin.WindowCommand):
     def run(self):
         breakpoints = load_breakpoints(self.window)
         if breakpoints:
-            unfolded_breakpoints = [
-                '%s:%i' % (path, line + 1)
+            locations = [
+                (path, line + 1)
                 for path, lines in breakpoints.items() for line in lines
             ]
+            unfolded_breakpoints = [
+                '%s:%i' % location for location in locations
+            ]
+            items = unfolded_breakpoints
+            if breakpoint_stats:
+                items = [
+                    [item, self.breakpoint_stats_text(location)]
+                    for item, location in zip(unfolded_breakpoints, locations)
+                ]
 
             self.window.show_quick_panel(
-                unfolded_breakpoints,
+                items,
                 lambda index: None,
                 0,
                 0,
@@ -278,6 +1751,10 @@ class LldbListBreakpoints(sublime_plugin.WindowCommand):
                     self.on_breakpoint_selected(unfolded_breakpoints[index])
             )
 
+    def breakpoint_stats_text(self, location):
+        entry = breakpoint_stats.get(location)
+        return format_breakpoint_stats(entry) if entry else 'not hit'
+
     def on_breakpoint_selected(self, path):
         self.window.open_file(path, sublime.ENCODED_POSITION)
 
@@ -286,7 +1763,7 @@ class LldbClearBreakpoints(sublime_plugin.WindowCommand):
 
     def run(self):
         clear_breakpoints(self.window)
-        set_all_breakpoints()
+        set_visible_breakpoints(self.window)
 
 
 class LldbToggleBreakpoint(sublime_plugin.TextCommand):
@@ -315,16 +1792,186 @@ class LldbToggleBreakpoint(sublime_plugin.TextCommand):
         save_breakpoints(self.view)
 
 
+def variable_path_at(view, point):
+    line = view.line(point)
+    text = view.substr(line)
+    column = point - line.a
+    for match in variable_path_pattern.finditer(text):
+        if match.start() <= column < match.end():
+            end = re.match(r'\w*', text[column:]).end() + column
+            return text[match.start():end].rstrip('.->')
+    return None
+
+
+variable_path_pattern = re.compile(r'[A-Za-z_]\w*(?:(?:\.|->)[A-Za-z_]\w*)*')
+
+
+class LldbSetTemporaryBreakpoint(sublime_plugin.TextCommand):
+    """ Sets a one-shot breakpoint which only exists in the debugger """
+
+    def run(self, edit):
+        line = self.view.rowcol(self.view.sel()[-1].a)[0]
+        lldb_server.lldb_service.target_set_temporary_breakpoint(
+            file=self.view.file_name(),
+            line=line + 1,
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None and self.view.file_name() is not None
+
+
+class LldbRunToCursor(sublime_plugin.TextCommand):
+
+    def run(self, edit):
+        line = self.view.rowcol(self.view.sel()[-1].a)[0]
+        lldb_server.lldb_service.run_to_line(
+            file=self.view.file_name(),
+            line=line + 1,
+        )
+
+    def is_enabled(self):
+        return lldb_server is not None and \
+            self.view.file_name() is not None and process_state == 'stopped'
+
+
+class LldbShowStats(sublime_plugin.WindowCommand):
+
+    def run(self):
+        items = []
+        if 'plugin_load' in load_stats:
+            items.append(['Plugin load', format_duration(
+                load_stats['plugin_load'])])
+        if 'breakpoint_rendering' in load_stats:
+            items.append([
+                'Initial breakpoint rendering',
+                '%s for %i views' % (
+                    format_duration(load_stats['breakpoint_rendering']),
+                    load_stats['breakpoint_rendered_views'],
+                ),
+            ])
+        items.extend(
+            ['%s:%i' % (os.path.basename(entry['file']), entry['line']),
+                format_breakpoint_stats(entry)]
+            for entry in breakpoint_stats.values()
+        )
+        items.extend(
+            ['Watchpoint %i: %s' % (entry['id'], entry['description']),
+                '%i hits' % entry['hits']]
+            for entry in watchpoints.values()
+        )
+        self.window.show_quick_panel(items, lambda index: None)
+
+
+class LldbDisassembleMore(sublime_plugin.TextCommand):
+
+    def run(self, edit):
+        if disassembly_instructions:
+            request_instructions(
+                self.view, next_instruction_address(), page_size)
+
+    def is_enabled(self):
+        return self.view.name() == 'lldb-disassembly'
+
+
 class LldbIndicatorsListener(sublime_plugin.EventListener):
 
+    hover_generation = 0
+
     def on_load(self, view):
         self._show_pending_run_pointer(view)
 
+    def on_query_context(self, view, key, operator, operand, match_all):
+        if key == 'lldb_debugging':
+            debugging = lldb_server is not None
+            if operator == sublime.OP_NOT_EQUAL:
+                return debugging != (operand if operand is not None else True)
+            return debugging == (operand if operand is not None else True)
+        return None
+
+    def on_hover(self, view, point, hover_zone):
+        if hover_zone != sublime.HOVER_TEXT or process_state != 'stopped' \
+                or lldb_server is None or view.file_name() is None:
+            return
+
+        path = variable_path_at(view, point)
+        if path:
+            LldbIndicatorsListener.hover_generation += 1
+            generation = LldbIndicatorsListener.hover_generation
+            settings = sublime.load_settings('sublime-lldb.sublime-settings')
+            sublime.set_timeout(
+                lambda: self._lookup_variable(view, point, path, generation),
+                settings.get('hover_delay', 300),
+            )
+
+    def _lookup_variable(self, view, point, path, generation):
+        # the process may have been resumed during the delay
+        if generation != LldbIndicatorsListener.hover_generation \
+                or lldb_server is None or process_state != 'stopped':
+            return
+
+        key = (path, selected_frame, stop_count)
+        result = hover_cache.get(key)
+        if result is not None:
+            self._show_variable(view, point, path, result)
+        elif key in hover_pending:
+            # a lookup for the same token is in flight already
+            hover_pending[key] = (view, point, generation)
+        else:
+            hover_pending[key] = (view, point, generation)
+
+            def on_result(result):
+                if key[2] != stop_count:
+                    return
+                hover_cache[key] = result
+                view, point, generation = hover_pending.pop(key)
+                if generation == LldbIndicatorsListener.hover_generation:
+                    self._show_variable(view, point, path, result)
+
+            thread_index, frame_index = selected_frame or (None, None)
+            lldb_server.lldb_service.request(
+                'frame_find_variable',
+                on_main_thread(on_result),
+                path=path,
+                thread_index=thread_index,
+                frame_index=frame_index,
+            )
+
+    def _show_variable(self, view, point, path, result):
+        if 'error' in result:
+            return
+
+        lines = ['<b>%s</b> = %s' % (
+            html.escape(path), html.escape(format_value(result)))]
+        lines.extend(
+            '&nbsp;&nbsp;%s = %s' % (
+                html.escape(child['name'] or ''),
+                html.escape(format_value(child)),
+            )
+            for child in result['children']
+        )
+        view.show_popup(
+            '<br>'.join(lines),
+            sublime.HIDE_ON_MOUSE_MOVE_AWAY,
+            point,
+            max_width=800,
+        )
+
     def on_load_async(self, view):
         self._update_breakpoints(view)
 
+    def on_selection_modified_async(self, view):
+        # fetches the next instructions when moving towards the end
+        if view.name() != 'lldb-disassembly' or \
+                not disassembly_instructions or len(view.sel()) == 0:
+            return
+
+        row, _ = view.rowcol(view.sel()[0].b)
+        if row >= len(disassembly_instructions) - 10:
+            request_instructions(view, next_instruction_address(), page_size)
+
     def on_activated_async(self, view):
         self._update_breakpoints(view)
+        set_breakpoint_stats_for_view(view)
 
     def _update_breakpoints(self, view):
         if view.window():
@@ -419,6 +2066,13 @@ class LldbConsoleAppendText(sublime_plugin.TextCommand):
             self.view.show(self.view.size())
 
 
+class LldbReplaceText(sublime_plugin.TextCommand):
+
+    def run(self, edit, text):
+        with writeable_view(self.view):
+            self.view.replace(edit, sublime.Region(0, self.view.size()), text)
+
+
 class LldbConsoleSetInput(sublime_plugin.TextCommand):
 
     def run(self, edit, command):
@@ -455,34 +2109,163 @@ class LldbConsoleHidePrompt(sublime_plugin.TextCommand):
 
 
 class CommandHistory(object):
+    """ Console command history which is persisted per project
+
+    Commands are appended to a file with one JSON string per line which
+    is only read on first use. Duplicates keep their most recent
+    position and a sorted index allows prefix lookups.
+    """
 
-    def __init__(self):
-        self._commands = []
+    max_size = 5000
+
+    def __init__(self, path):
+        self.path = path
+        self._order = None
+        self._sorted = None
+        self._counter = 0
+        self._matches = None
         self._position = None
+        self._prefix = ''
 
     def next(self):
-        if len(self._commands) > 0:
-            self._position = max(self._position -1, 0)
-            return self._commands[self._position]
-
-    def previous(self):
-        if len(self._commands) > 0:
+        if self._matches is None or self._position is None:
+            return None
+
+        self._position -= 1
+        if self._position < 0:
+            # back below the most recent entry, restore the typed input
+            self._position = None
+            self._matches = None
+            return self._prefix
+        return self._matches[self._position]
+
+    def previous(self, prefix=''):
+        if self._position is not None and \
+                prefix != self._matches[self._position]:
+            # the input was edited since the last recall
+            self._matches = None
+
+        if self._matches is None:
+            self._prefix = prefix
+            self._matches = self.search(prefix)
+            self._position = None
+
+        if len(self._matches) > 0:
             if self._position is None:
                 self._position = 0
             else:
                 self._position = min(
                     self._position + 1,
-                    len(self._commands) - 1,
+                    len(self._matches) - 1,
                 )
 
-            return self._commands[self._position]
+            return self._matches[self._position]
 
     def insert(self, command):
-        self._commands.insert(0, command)
+        self._load()
+        self._add(command)
+        self._matches = None
         self._position = None
 
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(command) + '\n')
+
+    def search(self, prefix=''):
+        """ Returns the commands starting with prefix, most recent first """
+        self._load()
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = start
+        while end < len(self._sorted) and \
+                self._sorted[end].startswith(prefix):
+            end += 1
+        return sorted(
+            self._sorted[start:end],
+            key=lambda command: self._order[command],
+            reverse=True,
+        )
+
+    def _add(self, command):
+        if command in self._order:
+            self._sorted.pop(bisect.bisect_left(self._sorted, command))
+        bisect.insort(self._sorted, command)
+        self._counter += 1
+        self._order[command] = self._counter
+
+        if len(self._order) > self.max_size:
+            oldest = min(self._order, key=self._order.get)
+            del self._order[oldest]
+            self._sorted.pop(bisect.bisect_left(self._sorted, oldest))
+
+    def _load(self):
+        if self._order is not None:
+            return
+
+        self._order = {}
+        self._sorted = []
+        lines = []
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except (IOError, OSError):
+            pass
+
+        commands = []
+        for line in lines:
+            try:
+                commands.append(json.loads(line))
+            except ValueError:
+                pass
+
+        for i, command in enumerate(commands):
+            self._order[command] = i
+        self._counter = len(commands)
+        if len(self._order) > self.max_size:
+            for command in sorted(self._order, key=self._order.get)[
+                    :len(self._order) - self.max_size]:
+                del self._order[command]
+        self._sorted = sorted(self._order)
+
+        if len(lines) > 2 * self.max_size:
+            self._compact()
+
+    def _compact(self):
+        with open(self.path, 'w') as f:
+            for command in sorted(self._order, key=self._order.get):
+                f.write(json.dumps(command) + '\n')
+
+
+command_histories = {}
+
+
+def get_command_history(window):
+    path = project_file_path(window, '.lldb-history')
+    history = command_histories.get(path)
+    if history is None:
+        history = command_histories[path] = CommandHistory(path)
+    return history
+
+
+class LldbConsoleHistorySearch(sublime_plugin.WindowCommand):
+    """ Fuzzy search through the console history of the project """
 
-command_history = CommandHistory()
+    def run(self):
+        commands = get_command_history(self.window).search()
+
+        def on_done(index):
+            console = self.window.find_output_panel('lldb')
+            if index != -1 and console is not None:
+                self.window.run_command(
+                    'show_panel', args={'panel': 'output.lldb'})
+                console.run_command(
+                    'lldb_console_set_input',
+                    args={'command': commands[index]},
+                )
+                self.window.focus_view(console)
+
+        self.window.show_quick_panel(commands, on_done)
+
+    def is_enabled(self):
+        return self.window.find_output_panel('lldb') is not None
 
 
 class LldbConsoleListener(sublime_plugin.EventListener):
@@ -519,7 +2302,7 @@ class LldbConsoleListener(sublime_plugin.EventListener):
         command = extract_command(view)
         if command is not None and lldb_server is not None:
             lldb_server.lldb_service.handle_command(input=command)
-            command_history.insert(command)
+            get_command_history(view.window()).insert(command)
 
     def on_query_completions(self, view, prefix, locations):
         if view.name() == 'lldb-console':
@@ -531,8 +2314,9 @@ class LldbConsoleListener(sublime_plugin.EventListener):
                 return [(m, m) for m in matches]
 
     def on_command_history(self, view, previous):
-        command = command_history.previous() if previous \
-            else command_history.next()
+        command_history = get_command_history(view.window())
+        command = command_history.previous(extract_command(view) or '') \
+            if previous else command_history.next()
 
         if command is not None:
             view.run_command(
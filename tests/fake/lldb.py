@@ -0,0 +1,187 @@
+""" Stand-in for the lldb module which is just enough to launch and kill
+
+Launched processes report their state changes to the listener of the
+launch info like lldb does in asynchronous mode.
+"""
+try:
+    from queue import Empty, Queue
+except ImportError:
+    from Queue import Empty, Queue
+
+
+UINT32_MAX = 2 ** 32 - 1
+LLDB_ARCH_DEFAULT = 'systemArch'
+
+(
+    eStateInvalid,
+    eStateUnloaded,
+    eStateConnected,
+    eStateAttaching,
+    eStateLaunching,
+    eStateStopped,
+    eStateRunning,
+    eStateStepping,
+    eStateCrashed,
+    eStateDetached,
+    eStateExited,
+    eStateSuspended,
+) = range(12)
+
+(
+    eStopReasonInvalid,
+    eStopReasonNone,
+    eStopReasonTrace,
+    eStopReasonBreakpoint,
+    eStopReasonWatchpoint,
+    eStopReasonSignal,
+    eStopReasonException,
+    eStopReasonExec,
+    eStopReasonPlanComplete,
+    eStopReasonThreadExiting,
+    eStopReasonInstrumentation,
+) = range(11)
+
+eBreakpointEventTypeRemoved = 2
+
+
+class SBError(object):
+
+    def Success(self):
+        return True
+
+    def GetCString(self):
+        return None
+
+
+class SBEvent(object):
+
+    def __init__(self, broadcaster_class=None, event_type=0, state=None):
+        self.broadcaster_class = broadcaster_class
+        self.event_type = event_type
+        self.state = state
+
+    def IsValid(self):
+        return self.broadcaster_class is not None
+
+    def GetBroadcasterClass(self):
+        return self.broadcaster_class
+
+    def GetType(self):
+        return self.event_type
+
+
+class SBListener(object):
+
+    def __init__(self, name=None):
+        self.events = Queue()
+
+    def StartListeningForEventClass(self, debugger, class_name, mask):
+        return mask
+
+    def WaitForEvent(self, timeout, event):
+        try:
+            received = self.events.get(timeout=timeout)
+        except Empty:
+            return False
+        event.__dict__.update(received.__dict__)
+        return True
+
+
+class SBProcess(object):
+
+    eBroadcastBitStateChanged = 1
+    eBroadcastBitSTDOUT = 4
+    eBroadcastBitSTDERR = 8
+
+    def __init__(self, listener):
+        self.listener = listener
+        self.state = eStateLaunching
+
+    @staticmethod
+    def GetBroadcasterClassName():
+        return 'lldb.process'
+
+    @staticmethod
+    def GetStateFromEvent(event):
+        return event.state
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def GetState(self):
+        return self.state
+
+    def Kill(self):
+        self._set_state(eStateExited)
+        return SBError()
+
+    def _set_state(self, state):
+        self.state = state
+        self.listener.events.put(SBEvent(
+            self.GetBroadcasterClassName(),
+            self.eBroadcastBitStateChanged,
+            state,
+        ))
+
+
+class SBThread(object):
+
+    eBroadcastBitSelectedFrameChanged = 16
+
+    @staticmethod
+    def GetBroadcasterClassName():
+        return 'lldb.thread'
+
+
+class SBTarget(object):
+
+    eBroadcastBitBreakpointChanged = 1
+
+    @staticmethod
+    def GetBroadcasterClassName():
+        return 'lldb.target'
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def Launch(self, launch_info, error):
+        process = SBProcess(launch_info.listener)
+        process._set_state(eStateRunning)
+        return process
+
+
+class SBBreakpoint(object):
+    pass
+
+
+class SBLaunchInfo(object):
+
+    def __init__(self, arguments):
+        self.arguments = arguments
+        self.listener = None
+
+    def SetEnvironmentEntries(self, entries, append):
+        self.environment = entries
+
+    def SetListener(self, listener):
+        self.listener = listener
+
+
+class SBDebugger(object):
+
+    @staticmethod
+    def Create():
+        return SBDebugger()
+
+    def SetAsync(self, async_mode):
+        pass
+
+    def SetUseColor(self, use_color):
+        pass
+
+    def CreateTargetWithFileAndArch(self, path, arch):
+        return SBTarget()
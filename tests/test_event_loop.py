@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'fake'))
+import lldb  # noqa: E402
+
+from lldbclient.service import LldbService  # noqa: E402
+
+
+class RecordingListener(object):
+
+    def __init__(self):
+        self.events = []
+
+    def notify_event(self, name, **args):
+        self.events.append(dict(args, type=name))
+
+    def count(self, name, **args):
+        return len([
+            event for event in self.events
+            if event['type'] == name and
+            all(event.get(key) == value for key, value in args.items())
+        ])
+
+
+class EventLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        self.assertTrue(
+            hasattr(lldb.SBProcess, '_set_state'), 'real lldb module loaded')
+        self.listener = RecordingListener()
+        self.service = LldbService(self.listener)
+
+    def tearDown(self):
+        self.service.stop()
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_no_threads_leak_across_relaunches(self):
+        self.service.create_target('/bin/true')
+        thread_count = threading.active_count()
+
+        for _ in range(1000):
+            self.service.target_launch([], {})
+            self.service.process_kill()
+
+        self.assertEqual(threading.active_count(), thread_count)
+        self.assertTrue(self.wait_for(
+            lambda: self.listener.count(
+                'process_state', state='exited') == 1000))
+        self.assertEqual(threading.active_count(), thread_count)
+
+    def test_stop_is_bounded(self):
+        started = time.time()
+        self.service.stop()
+        self.assertFalse(self.service.event_thread.is_alive())
+        self.assertLess(
+            time.time() - started, self.service.event_timeout * 2)
+
+    def test_failing_callback_keeps_loop_running(self):
+        def fail(event):
+            raise RuntimeError('broken')
+
+        self.service.event_callbacks[(
+            lldb.SBProcess.GetBroadcasterClassName(),
+            lldb.SBProcess.eBroadcastBitStateChanged,
+        )] = fail
+        self.service.create_target('/bin/true')
+        self.service.target_launch([], {})
+
+        self.assertTrue(self.wait_for(
+            lambda: self.listener.count('error') == 1))
+        self.assertTrue(self.service.event_thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
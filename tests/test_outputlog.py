@@ -0,0 +1,74 @@
+import re
+import shutil
+import tempfile
+import unittest
+
+from lldbserver.outputlog import OutputLog
+
+
+class OutputLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.times = iter(range(100))
+        self.log = OutputLog(
+            self.directory + '/output', clock=lambda: next(self.times))
+
+    def tearDown(self):
+        self.log.close()
+        shutil.rmtree(self.directory)
+
+    def test_line_time_is_time_of_chunk_it_started_in(self):
+        self.log.append('abc', 'stdout')
+        self.log.append('def\nghi', 'stderr')
+        self.log.append('\n')
+        self.log.flush()
+
+        self.assertEqual(self.log.read_lines(0, 10), [
+            (0, 0, 'stdout', 'abcdef'),
+            (1, 1, 'stderr', 'ghi'),
+        ])
+
+    def test_partial_line_is_not_read(self):
+        self.log.append('one\ntw')
+        self.log.flush()
+        self.assertEqual(
+            [text for _, _, _, text in self.log.read_lines(0, 10)], ['one'])
+
+    def test_search_in_pages(self):
+        OutputLog.index_interval, interval = 3, OutputLog.index_interval
+        try:
+            for i in range(20):
+                self.log.append('line %i\n' % i)
+            self.log.flush()
+
+            pattern = re.compile(r'line 1\d')
+            matches, next_line = self.log.search(pattern, 0, 4)
+            self.assertEqual([line for line, _, _, _ in matches],
+                             [10, 11, 12, 13])
+            matches, next_line = self.log.search(pattern, next_line, 10)
+            self.assertEqual([line for line, _, _, _ in matches],
+                             list(range(14, 20)))
+            self.assertIsNone(next_line)
+        finally:
+            OutputLog.index_interval = interval
+
+    def test_oldest_segments_are_dropped(self):
+        self.log.max_segments = 2
+        OutputLog.segment_size, size = 10, OutputLog.segment_size
+        try:
+            for i in range(10):
+                self.log.append('line %i\n' % i)
+            self.log.flush()
+        finally:
+            OutputLog.segment_size = size
+
+        # two lines fit into a segment
+        self.assertEqual(self.log.first_line, 6)
+        self.assertEqual(
+            [text for _, _, _, text in self.log.read_lines(0, 10)],
+            ['line 6', 'line 7', 'line 8', 'line 9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
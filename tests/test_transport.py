@@ -0,0 +1,100 @@
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import unittest
+
+from ipc.client import JsonClient
+from ipc.message import ConnectionClosedError, compression_threshold, \
+    read_json, write_json
+from ipc.server import JsonServer
+
+
+def connect(server, client):
+    thread = threading.Thread(target=server.wait_for_connection, args=(5,))
+    thread.start()
+    client.connect()
+    thread.join()
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def round_trip(self, address, compress):
+        server = JsonServer(address, compress)
+        client = JsonClient(server.address, compress)
+        connect(server, client)
+        try:
+            small = {'command': 'heartbeat'}
+            large = {'output': 'x' * (2 * compression_threshold)}
+            for data in (small, large):
+                client.send_json(data)
+                self.assertEqual(read_json(server.connection), data)
+                server.send_json(data)
+                self.assertEqual(client.receive_json(), data)
+        finally:
+            client.close()
+            server.shutdown()
+
+    def test_tcp(self):
+        self.round_trip('tcp://127.0.0.1:0', False)
+
+    def test_tcp_compressed(self):
+        self.round_trip('tcp://127.0.0.1:0', True)
+
+    def test_unix(self):
+        self.round_trip(os.path.join(self.directory, 'socket'), False)
+
+    def test_unix_compressed(self):
+        self.round_trip(os.path.join(self.directory, 'socket'), True)
+
+    def test_read_timeout_closes_connection(self):
+        server = JsonServer('tcp://127.0.0.1:0')
+        client = JsonClient(server.address, read_timeout=0.1)
+        connect(server, client)
+        try:
+            self.assertRaises(ConnectionClosedError, client.receive_json)
+        finally:
+            client.close()
+            server.shutdown()
+
+
+class FrameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def send(self, data, compress):
+        """ Returns whether the frame was compressed """
+        write_json(self.sender, data, compress)
+        header = self.receiver.recv(4, socket.MSG_PEEK)
+        compressed = bool(struct.unpack('!I', header)[0] & 0x80000000)
+        self.assertEqual(read_json(self.receiver), data)
+        return compressed
+
+    def test_uncompressed(self):
+        data = {'output': 'x' * (2 * compression_threshold)}
+        self.assertFalse(self.send(data, False))
+
+    def test_compressed(self):
+        data = {'output': 'x' * (2 * compression_threshold)}
+        self.assertTrue(self.send(data, True))
+
+    def test_below_threshold_is_not_compressed(self):
+        data = {'output': 'x' * (compression_threshold // 2)}
+        self.assertFalse(self.send(data, True))
+
+    def test_closed_connection(self):
+        self.sender.close()
+        self.assertRaises(ConnectionClosedError, read_json, self.receiver)
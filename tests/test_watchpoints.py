@@ -0,0 +1,64 @@
+import unittest
+
+from lldbclient.watchpoints import WatchpointError, WatchpointSlots
+
+
+def entry(watchpoint_id, hits=0):
+    return {'id': watchpoint_id, 'description': 'w%i' % watchpoint_id,
+            'hits': hits}
+
+
+class WatchpointSlotsTest(unittest.TestCase):
+
+    def test_reserve_free_slot(self):
+        slots = WatchpointSlots(2)
+        self.assertIsNone(slots.reserve())
+        slots.add(entry(1))
+        self.assertIsNone(slots.reserve())
+
+    def test_refuse_when_full(self):
+        slots = WatchpointSlots(1)
+        slots.add(entry(1))
+        self.assertRaises(WatchpointError, slots.reserve)
+
+    def test_evict_oldest(self):
+        slots = WatchpointSlots(2, 'oldest')
+        slots.add(entry(1))
+        slots.add(entry(2))
+        self.assertEqual(slots.reserve()['id'], 1)
+
+    def test_evict_least_hit(self):
+        slots = WatchpointSlots(2, 'least_hit')
+        slots.add(entry(1))
+        slots.add(entry(2))
+        slots.on_hit(1)
+        self.assertEqual(slots.reserve()['id'], 2)
+
+    def test_remove_frees_slot(self):
+        slots = WatchpointSlots(1)
+        slots.add(entry(1))
+        self.assertEqual(slots.remove(1)['id'], 1)
+        self.assertIsNone(slots.remove(1))
+        self.assertIsNone(slots.reserve())
+
+    def test_reserve_doesnt_free_slot(self):
+        slots = WatchpointSlots(1, 'oldest')
+        slots.add(entry(1))
+        slots.reserve()
+        self.assertEqual([e['id'] for e in slots.entries], [1])
+
+    def test_hit_counts_reported_once(self):
+        slots = WatchpointSlots(2)
+        slots.add(entry(1))
+        slots.on_hit(1)
+        slots.on_hit(1)
+        self.assertEqual(slots.take_counts(),
+                         [{'id': 1, 'description': 'w1', 'hits': 2}])
+        self.assertIsNone(slots.take_counts())
+
+    def test_unknown_policy(self):
+        self.assertRaises(WatchpointError, WatchpointSlots, 1, 'newest')
+
+
+if __name__ == '__main__':
+    unittest.main()